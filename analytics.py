@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Progress analytics over the session history both counters append to
+(voice_counter_sessions.csv).
+
+Sessions are read in chunks into columnar NumPy arrays and reduced to
+per-patient, per-week totals with grouped vectorised passes (np.unique +
+np.bincount), so memory is bounded by the chunk size and the number of
+patient-weeks, never by the number of sessions.
+
+    python analytics.py report voice_counter_sessions.csv --out reports
+    python analytics.py bench --sessions 1000000
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# ── NumPy is only needed for analytics, not for counting ──────────────────────
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+SESSIONS_FILE  = "voice_counter_sessions.csv"
+SESSION_FIELDS = ("finished_at", "patient", "preset", "sets", "reps", "seconds", "completed")
+CHUNK_ROWS     = 50_000
+TARGET_PER_WEEK = 3   # prescribed sessions per week, for adherence
+
+# Columns actually used, in file order (preset and sets are skipped)
+USECOLS = (0, 1, 4, 5, 6)
+PATIENT_CHARS = 64   # longer patient ids are rejected, never truncated
+
+# ── Loading ───────────────────────────────────────────────────────────────────
+def _dtype():
+    return np.dtype([
+        ("finished_at", "datetime64[s]"),
+        # One spare character so an over-long id is detectable, not truncated
+        ("patient",     f"U{PATIENT_CHARS + 1}"),
+        ("reps",        "i4"),
+        ("seconds",     "f8"),
+        ("completed",   "i1"),
+    ])
+
+def iter_chunks(path, chunk_rows=CHUNK_ROWS):
+    """Yield the history in chunks of columnar arrays.
+
+    Each chunk is a dict of 1-D arrays: ``week`` (Monday-based weeks since
+    the epoch), ``patient``, ``reps``, ``seconds`` and ``completed``.
+    Raises ValueError for a patient id longer than PATIENT_CHARS.
+    """
+    dtype = _dtype()
+    with open(path, newline="") as f:
+        header = next(f, "").strip().split(",")
+        if tuple(header) != SESSION_FIELDS:
+            raise ValueError(f"{path}: expected header {','.join(SESSION_FIELDS)}")
+        first_line = 2
+        while True:
+            lines = list(itertools.islice(f, chunk_rows))
+            if not lines:
+                return
+            rows = np.loadtxt(lines, delimiter=",", quotechar='"', dtype=dtype,
+                              usecols=USECOLS, ndmin=1)
+            too_long = np.flatnonzero(np.char.str_len(rows["patient"]) > PATIENT_CHARS)
+            if len(too_long):
+                raise ValueError(f"{path}:{first_line + too_long[0]}: patient id longer "
+                                 f"than {PATIENT_CHARS} characters")
+            first_line += len(lines)
+            days = rows["finished_at"].astype("datetime64[D]").astype(np.int64)
+            yield {
+                # 1970-01-01 was a Thursday; shift so weeks start on Monday
+                "week":      (days + 3) // 7,
+                "patient":   rows["patient"],
+                "reps":      rows["reps"].astype(np.int64),
+                "seconds":   rows["seconds"],
+                "completed": rows["completed"].astype(bool),
+            }
+
+# ── Aggregation ───────────────────────────────────────────────────────────────
+SUMS = ("sessions", "completed", "reps", "seconds")
+
+def _reduce(keys, sums):
+    """Merge duplicate group keys, adding their sums."""
+    ukeys, inv = np.unique(keys, return_inverse=True)
+    return ukeys, {name: np.bincount(inv, weights=col, minlength=len(ukeys))
+                   for name, col in sums.items()}
+
+def aggregate(chunks):
+    """Reduce session chunks to per-(patient, week) totals.
+
+    Returns (patients, table) where ``patients`` lists patient ids by code and
+    ``table`` holds parallel arrays sorted by patient code then week:
+    ``patient`` (code), ``week``, ``sessions``, ``completed``, ``reps``,
+    ``seconds``.
+    """
+    codes = {}
+    keys, sums = np.empty(0, np.int64), {name: np.empty(0) for name in SUMS}
+    for chunk in chunks:
+        # Map patient ids to stable integer codes; only the distinct ids of
+        # the chunk go through Python
+        uniq, inv = np.unique(chunk["patient"], return_inverse=True)
+        lookup = np.array([codes.setdefault(p, len(codes)) for p in uniq.tolist()], np.int64)
+        chunk_keys = (lookup[inv] << 32) | chunk["week"]
+        chunk_sums = {
+            "sessions":  np.ones(len(chunk_keys)),
+            "completed": chunk["completed"],
+            "reps":      chunk["reps"],
+            "seconds":   chunk["seconds"],
+        }
+        # Fold the chunk into the running totals, keeping them one row per group
+        keys, sums = _reduce(
+            np.concatenate([keys, chunk_keys]),
+            {name: np.concatenate([sums[name], chunk_sums[name]]) for name in SUMS})
+
+    table = {"patient": keys >> 32, "week": keys & 0xFFFFFFFF}
+    table.update(sums)
+    patients = [None] * len(codes)
+    for p, code in codes.items():
+        patients[code] = p
+    return patients, table
+
+def _slope(group, x, y, ngroups):
+    """Least-squares slope of y over x within each group, 0 where undefined."""
+    n   = np.bincount(group, minlength=ngroups)
+    sx  = np.bincount(group, x, ngroups)
+    sy  = np.bincount(group, y, ngroups)
+    sxy = np.bincount(group, x * y, ngroups)
+    sxx = np.bincount(group, x * x, ngroups)
+    den = n * sxx - sx * sx
+    return np.divide(n * sxy - sx * sy, den, out=np.zeros(ngroups), where=den > 0)
+
+def summarise(patients, table, target=TARGET_PER_WEEK):
+    """Per-patient totals, adherence and trends, all as arrays indexed by code.
+
+    Adherence is completed sessions against ``target`` per week (capped at 1
+    per week), averaged over every week from a patient's first to last
+    session, so missed weeks count as 0. Volume is reps per active week and
+    pace is reps per minute; their trends are least-squares slopes per week.
+    """
+    ngroups = len(patients)
+    group = table["patient"]
+    week = table["week"]
+
+    first = np.full(ngroups, np.iinfo(np.int64).max)
+    last = np.full(ngroups, np.iinfo(np.int64).min)
+    np.minimum.at(first, group, week)
+    np.maximum.at(last, group, week)
+    span = last - first + 1
+
+    weekly_adherence = np.minimum(table["completed"] / target, 1.0)
+    minutes = table["seconds"] / 60
+    weekly_pace = np.divide(table["reps"], minutes, out=np.zeros(len(week)), where=minutes > 0)
+    x = (week - first[group]).astype(float)
+
+    total = {name: np.bincount(group, table[name], ngroups) for name in SUMS}
+    total_minutes = total["seconds"] / 60
+    return {
+        "first_week":    first,
+        "last_week":     last,
+        "active_weeks":  np.bincount(group, minlength=ngroups),
+        "sessions":      total["sessions"].astype(np.int64),
+        "completed":     total["completed"].astype(np.int64),
+        "reps":          total["reps"].astype(np.int64),
+        "minutes":       total_minutes,
+        "adherence":     np.bincount(group, weekly_adherence, ngroups) / span,
+        "pace":          np.divide(total["reps"], total_minutes, out=np.zeros(ngroups),
+                                   where=total_minutes > 0),
+        "volume_trend":  _slope(group, x, table["reps"], ngroups),
+        "pace_trend":    _slope(group, x, weekly_pace, ngroups),
+    }
+
+# ── Reports ───────────────────────────────────────────────────────────────────
+def week_start(week):
+    """Date of the Monday that starts a Monday-based epoch week."""
+    return str(np.datetime64(int(week) * 7 - 3, "D"))
+
+def report_name(patient):
+    return (re.sub(r"[^\w.-]+", "_", patient).strip("._") or "unknown") + ".txt"
+
+def write_reports(patients, table, summary, out_dir, target=TARGET_PER_WEEK):
+    """Write summary.csv and one text report per patient into ``out_dir``."""
+    os.makedirs(out_dir, exist_ok=True)
+    order = sorted(range(len(patients)), key=lambda i: patients[i])
+
+    with open(os.path.join(out_dir, "summary.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["patient", "first_week", "last_week", "active_weeks", "sessions",
+                         "completed", "reps", "minutes", "adherence", "reps_per_min",
+                         "volume_trend", "pace_trend"])
+        for i in order:
+            writer.writerow([
+                patients[i], week_start(summary["first_week"][i]), week_start(summary["last_week"][i]),
+                summary["active_weeks"][i], summary["sessions"][i], summary["completed"][i],
+                summary["reps"][i], f"{summary['minutes'][i]:.1f}", f"{summary['adherence'][i]:.3f}",
+                f"{summary['pace'][i]:.2f}", f"{summary['volume_trend'][i]:+.2f}",
+                f"{summary['pace_trend'][i]:+.3f}",
+            ])
+
+    # Rows are sorted by patient code, so each patient's weeks are one slice
+    bounds = np.searchsorted(table["patient"], np.arange(len(patients) + 1))
+    used = set()
+    for i in order:
+        lo, hi = bounds[i], bounds[i + 1]
+        name = report_name(patients[i])
+        if name in used:
+            name = f"{name[:-4]}_{i}.txt"
+        used.add(name)
+        lines = [
+            f"Patient:    {patients[i] or '(none)'}",
+            f"Period:     {week_start(summary['first_week'][i])} - "
+            f"{week_start(summary['last_week'][i])}",
+            f"Sessions:   {summary['sessions'][i]} ({summary['completed'][i]} completed)",
+            f"Adherence:  {summary['adherence'][i]:.0%} of {target} sessions/week",
+            f"Volume:     {summary['reps'][i]} reps, trend {summary['volume_trend'][i]:+.1f} reps/week",
+            f"Pace:       {summary['pace'][i]:.1f} reps/min, trend "
+            f"{summary['pace_trend'][i]:+.2f} per week",
+            "",
+            f"{'week of':<12}{'sessions':>9}{'completed':>10}{'reps':>8}{'minutes':>9}",
+        ]
+        for row in range(lo, hi):
+            lines.append(f"{week_start(table['week'][row]):<12}{int(table['sessions'][row]):>9}"
+                         f"{int(table['completed'][row]):>10}{int(table['reps'][row]):>8}"
+                         f"{table['seconds'][row] / 60:>9.1f}")
+        with open(os.path.join(out_dir, name), "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+def report(path, out_dir, target=TARGET_PER_WEEK, chunk_rows=CHUNK_ROWS):
+    patients, table = aggregate(iter_chunks(path, chunk_rows))
+    summary = summarise(patients, table, target)
+    write_reports(patients, table, summary, out_dir, target)
+    return patients, table, summary
+
+# ── Benchmark ─────────────────────────────────────────────────────────────────
+def write_synthetic(path, sessions, patients=500, weeks=26, seed=1):
+    """Write a synthetic history of ``sessions`` rows."""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2026-01-05T08:00:00")
+    presets = np.array(["Push-ups", "Squats", "Jumping Jacks", "Plank", "Burpees", "Sit-ups"])
+    with open(path, "w", newline="") as f:
+        f.write(",".join(SESSION_FIELDS) + "\n")
+        for lo in range(0, sessions, CHUNK_ROWS):
+            n = min(CHUNK_ROWS, sessions - lo)
+            when = start + rng.integers(0, weeks * 7 * 86400, n).astype("timedelta64[s]")
+            reps = rng.integers(20, 120, n)
+            cols = [
+                when.astype(str),
+                np.char.add("patient-", rng.integers(0, patients, n).astype(str)),
+                presets[rng.integers(0, len(presets), n)],
+                rng.integers(1, 5, n).astype(str),
+                reps.astype(str),
+                np.round(reps * rng.uniform(1.5, 4.0, n), 1).astype(str),
+                (rng.random(n) < 0.85).astype(int).astype(str),
+            ]
+            f.write("\n".join(",".join(row) for row in zip(*cols)) + "\n")
+
+def bench(sessions, chunk_rows=CHUNK_ROWS, keep=False):
+    tmp = tempfile.mkdtemp(prefix="voice_counter_bench_")
+    path = os.path.join(tmp, SESSIONS_FILE)
+    print(f"Writing {sessions:,} synthetic sessions ...")
+    write_synthetic(path, sessions)
+    size_mb = os.path.getsize(path) / 2**20
+
+    started = time.perf_counter()
+    patients, table, _ = report(path, os.path.join(tmp, "reports"), chunk_rows=chunk_rows)
+    elapsed = time.perf_counter() - started
+
+    # Tracing slows every allocation down, so measure memory in a second run
+    tracemalloc.start()
+    report(path, os.path.join(tmp, "reports"), chunk_rows=chunk_rows)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print(f"{sessions:,} sessions ({size_mb:.0f} MiB CSV), chunks of {chunk_rows:,} rows")
+    print(f"  {len(patients)} patients, {len(table['week']):,} patient-weeks, reports written")
+    print(f"  {elapsed:.2f} s  ({sessions / elapsed:,.0f} sessions/s)")
+    print(f"  peak traced memory {peak / 2**20:.1f} MiB")
+    if keep:
+        print(f"  files kept in {tmp}")
+    else:
+        shutil.rmtree(tmp)
+    return elapsed, peak
+
+# ── Main ──────────────────────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description="Progress analytics over the session history.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rep = sub.add_parser("report", help="write per-patient summary reports")
+    rep.add_argument("history", nargs="?", default=SESSIONS_FILE,
+                     help=f"session history CSV (default: {SESSIONS_FILE})")
+    rep.add_argument("--out", default="reports", help="output directory (default: reports)")
+    rep.add_argument("--target", type=float, default=TARGET_PER_WEEK,
+                     help=f"prescribed sessions per week (default: {TARGET_PER_WEEK})")
+    rep.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+
+    b = sub.add_parser("bench", help="time a report over synthetic sessions")
+    b.add_argument("--sessions", type=int, default=1_000_000)
+    b.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    b.add_argument("--keep", action="store_true", help="keep the generated files")
+    args = parser.parse_args()
+
+    if not NUMPY_AVAILABLE:
+        print("analytics.py needs NumPy:  pip install numpy", file=sys.stderr)
+        return 1
+
+    if args.command == "report":
+        if args.target <= 0 or args.chunk_rows <= 0:
+            parser.error("--target and --chunk-rows must be positive")
+        try:
+            patients, table, _ = report(args.history, args.out, args.target, args.chunk_rows)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        print(f"{len(patients)} patients, {len(table['week'])} patient-weeks -> {args.out}/")
+    else:
+        bench(args.sessions, args.chunk_rows, args.keep)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+"""
+Web bundle builder for the voice counter.
+
+index.html stays the single source (it is what GitHub Pages serves). This
+script turns it into an offline-capable bundle in dist/:
+
+  * the inline <style> and <script> move into minified, content-hashed
+    app.<hash>.css / app.<hash>.js files, so browsers can cache them forever
+    (and keep the compiled script) instead of re-parsing them on every load
+  * every text file gets precompressed .gz (and .br when the brotli module
+    is installed) siblings
+  * a service worker precaches the bundle so the app opens offline after the
+    first visit
+
+    python build_web.py build              # index.html -> dist/
+    python build_web.py serve              # serve dist/ with cache headers
+    python build_web.py compare            # load-time comparison vs index.html
+"""
+
+import argparse
+import gzip
+import hashlib
+import http.server
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+# ── Try to import brotli, fall back to gzip only ─────────────────────────────
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+ROOT      = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE  = os.path.join(ROOT, "index.html")
+DIST      = os.path.join(ROOT, "dist")
+HASH_LEN  = 10
+HASHED_RE = re.compile(r"\.[0-9a-f]{%d}\.(?:css|js)$" % HASH_LEN)
+
+SW_REGISTER = (
+    "<script>if('serviceWorker'in navigator)"
+    "addEventListener('load',function(){navigator.serviceWorker.register('sw.js')})"
+    "</script>"
+)
+
+# Cache-first for the hashed assets; the page itself is served from cache
+# immediately and refreshed in the background (stale-while-revalidate).
+SW_TEMPLATE = """\
+const CACHE = 'voice-counter-%(version)s';
+const ASSETS = %(assets)s;
+self.addEventListener('install', e => {
+  e.waitUntil(caches.open(CACHE).then(c => c.addAll(ASSETS)).then(() => self.skipWaiting()));
+});
+self.addEventListener('activate', e => {
+  e.waitUntil(caches.keys().then(keys => Promise.all(
+    keys.filter(k => k !== CACHE).map(k => caches.delete(k))
+  )).then(() => self.clients.claim()));
+});
+self.addEventListener('fetch', e => {
+  if (e.request.method !== 'GET') return;
+  const page = e.request.mode === 'navigate';
+  const key = page ? './' : e.request;
+  e.respondWith(caches.open(CACHE).then(c => c.match(key).then(hit => {
+    const fresh = fetch(e.request).then(r => {
+      if (r.ok && (page || !hit)) c.put(key, r.clone());
+      return r;
+    });
+    if (hit) {
+      if (page) e.waitUntil(fresh.catch(() => {}));
+      return hit;
+    }
+    return fresh;
+  })));
+});
+"""
+
+# ── Minifiers ────────────────────────────────────────────────────────────────
+# Deliberately conservative: they only drop comments and whitespace, never
+# rename or reorder, so the output behaves exactly like the source.
+
+CSS_TIGHT = "{};,>"
+
+def minify_css(css):
+    out = []
+    i, n = 0, len(css)
+    space = False
+    while i < n:
+        c = css[i]
+        if css.startswith("/*", i):
+            end = css.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+            space = True
+            continue
+        if c.isspace():
+            space = True
+            i += 1
+            continue
+        # A space after ':' never matters; before it, it may (".a :hover")
+        if space and out and out[-1][-1] not in CSS_TIGHT + ":" and c not in CSS_TIGHT:
+            out.append(" ")
+        space = False
+        if c in "\"'":
+            j = i + 1
+            while j < n and css[j] != c:
+                j += 2 if css[j] == "\\" else 1
+            out.append(css[i:j + 1])
+            i = j + 1
+            continue
+        if c == "}" and out and out[-1] == ";":
+            out.pop()
+        out.append(c)
+        i += 1
+    return "".join(out)
+
+def _literal_end(js, i):
+    """Index just past the string or template literal that starts at js[i].
+
+    Template ``${...}`` expressions are followed to their matching brace, so
+    object literals, calls and nested templates inside them are skipped whole.
+    """
+    quote, n = js[i], len(js)
+    j = i + 1
+    while j < n:
+        ch = js[j]
+        if ch == "\\":
+            j += 2
+        elif ch == quote:
+            return j + 1
+        elif quote == "`" and js.startswith("${", j):
+            j = _expression_end(js, j + 2)
+        else:
+            j += 1
+    return n
+
+def _expression_end(js, i):
+    """Index just past the brace closing a template expression whose body starts at js[i]."""
+    depth, n = 1, len(js)
+    while i < n:
+        ch = js[i]
+        if ch in "\"'`":
+            i = _literal_end(js, i)
+            continue
+        if ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if not depth:
+                return i + 1
+        i += 1
+    return n
+
+_JS_WORD = re.compile(r"[\w$]")
+# A '/' after one of these tokens begins a regex literal rather than a division
+_REGEX_AFTER = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "void", "yield", "delete"}
+
+def minify_js(js):
+    """Strip comments and indentation, keeping line breaks so ASI still holds."""
+    out = []
+    i, n = 0, len(js)
+    last = ""          # last token written
+    space = False
+
+    def emit(token):
+        nonlocal last, space
+        if space and out and out[-1] != "\n":
+            prev, nxt = out[-1][-1], token[0]
+            if (_JS_WORD.match(prev) and _JS_WORD.match(nxt)) or (prev in "+-" and nxt == prev):
+                out.append(" ")
+        space = False
+        out.append(token)
+        last = token
+
+    while i < n:
+        c = js[i]
+        if c in "\"'`":
+            j = _literal_end(js, i)
+            emit(js[i:j])
+            i = j
+        elif js.startswith("//", i):
+            end = js.find("\n", i)
+            i = n if end < 0 else end
+        elif js.startswith("/*", i):
+            end = js.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+            space = True
+        elif c == "/" and (not last or last in _REGEX_AFTER or last in _REGEX_KEYWORDS):
+            j = i + 1
+            in_class = False
+            while j < n and js[j] != "\n":
+                ch = js[j]
+                if ch == "\\":
+                    j += 2
+                    continue
+                if ch == "[":
+                    in_class = True
+                elif ch == "]":
+                    in_class = False
+                elif ch == "/" and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < n and _JS_WORD.match(js[j]):
+                j += 1  # flags
+            emit(js[i:j])
+            i = j
+        elif c == "\n":
+            if out and out[-1] != "\n":
+                out.append("\n")
+            space = False
+            i += 1
+        elif c.isspace():
+            space = True
+            i += 1
+        else:
+            j = i + 1
+            if _JS_WORD.match(c):
+                while j < n and _JS_WORD.match(js[j]):
+                    j += 1
+            emit(js[i:j])
+            i = j
+    return "".join(out).strip()
+
+def minify_html(html):
+    html = re.sub(r"<!--.*?-->", "", html, flags=re.S)
+    html = re.sub(r"\s+", " ", html)
+    return re.sub(r">\s+<", "> <", html).strip()
+
+# ── Build ────────────────────────────────────────────────────────────────────
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LEN]
+
+def split_template(html):
+    """Pull the inline <style> and <script> blocks out of the page."""
+    style = re.search(r"<style>(.*?)</style>", html, re.S)
+    script = re.search(r"<script>(.*?)</script>", html, re.S)
+    if not style or not script:
+        raise ValueError("template needs one inline <style> and one inline <script>")
+    return style.group(1), script.group(1), style.span(), script.span()
+
+def precompress(path):
+    """Write .gz (and .br) next to ``path`` when they are smaller."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    variants = [(".gz", gzip.compress(raw, compresslevel=9, mtime=0))]
+    if BROTLI_AVAILABLE:
+        variants.append((".br", brotli.compress(raw, quality=11)))
+    for ext, data in variants:
+        if len(data) < len(raw):
+            with open(path + ext, "wb") as f:
+                f.write(data)
+
+def build(template=TEMPLATE, dist=DIST):
+    """Build the bundle; returns {logical name: file name} for what was written."""
+    with open(template, encoding="utf-8") as f:
+        html = f.read()
+    css, js, style_span, script_span = split_template(html)
+
+    assets = {}
+    for name, text in (("app.css", minify_css(css)), ("app.js", minify_js(js))):
+        data = text.encode("utf-8")
+        stem, ext = os.path.splitext(name)
+        assets[name] = (f"{stem}.{content_hash(data)}{ext}", data)
+
+    # Splice from the end so the earlier span stays valid
+    page = html
+    for span, tag in sorted([
+        (style_span, f'<link rel="stylesheet" href="{assets["app.css"][0]}">'),
+        (script_span, f'<script src="{assets["app.js"][0]}" defer></script>'),
+    ], reverse=True):
+        page = page[:span[0]] + tag + page[span[1]:]
+    page = minify_html(page).replace("</body>", SW_REGISTER + "</body>")
+    page_data = page.encode("utf-8")
+
+    version = content_hash(page_data + b"".join(d for _, d in assets.values()))
+    precache = ["./"] + [fname for fname, _ in assets.values()]
+    sw = SW_TEMPLATE % {"version": version, "assets": json.dumps(precache)}
+
+    if os.path.isdir(dist):
+        shutil.rmtree(dist)
+    os.makedirs(dist)
+    files = {"index.html": ("index.html", page_data), "sw.js": ("sw.js", sw.encode("utf-8"))}
+    files.update(assets)
+    for fname, data in files.values():
+        path = os.path.join(dist, fname)
+        with open(path, "wb") as f:
+            f.write(data)
+        precompress(path)
+    return {name: fname for name, (fname, _) in files.items()}
+
+# ── Static Server ────────────────────────────────────────────────────────────
+class BundleHandler(http.server.SimpleHTTPRequestHandler):
+    """Serves precompressed variants and long-lived caching for hashed files."""
+
+    def log_message(self, fmt, *args):
+        if not getattr(self.server, "quiet", False):
+            super().log_message(fmt, *args)
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not self.path.split("?", 1)[0].endswith("/"):
+                return super().send_head()  # redirect to the slash form
+            path = os.path.join(path, "index.html")
+        if not os.path.isfile(path):
+            self.send_error(404, "File not found")
+            return None
+
+        accept = self.headers.get("Accept-Encoding", "")
+        encoding, served = None, path
+        for enc, ext in (("br", ".br"), ("gzip", ".gz")):
+            if re.search(r"\b%s\b" % enc, accept) and os.path.isfile(path + ext):
+                encoding, served = enc, path + ext
+                break
+
+        st = os.stat(served)
+        etag = '"%x-%x%s"' % (int(st.st_mtime), st.st_size, "-" + encoding if encoding else "")
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_cache_headers(path, etag)
+            self.end_headers()
+            return None
+
+        f = open(served, "rb")
+        self.send_response(200)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Length", str(st.st_size))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_cache_headers(path, etag)
+        self.end_headers()
+        return f
+
+    def send_cache_headers(self, path, etag):
+        if HASHED_RE.search(path):
+            self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+        else:
+            # index.html and sw.js must be revalidated so new builds are picked up
+            self.send_header("Cache-Control", "no-cache")
+        self.send_header("ETag", etag)
+        self.send_header("Vary", "Accept-Encoding")
+
+def make_server(directory, port, handler=BundleHandler, quiet=False):
+    def factory(*args, **kwargs):
+        return handler(*args, directory=directory, **kwargs)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), factory)
+    server.quiet = quiet
+    return server
+
+# ── Load-time Comparison ─────────────────────────────────────────────────────
+class PlainHandler(http.server.SimpleHTTPRequestHandler):
+    """How index.html is served from the repo today: no compression, no cache headers."""
+
+    def log_message(self, fmt, *args):
+        pass
+
+def fetch_page(base, accept_encoding, cache=None):
+    """Fetch a page and its stylesheets/scripts like a browser would.
+
+    ``cache`` holds validators from an earlier visit: immutable entries are
+    not requested again, the rest are revalidated (ETag or Last-Modified).
+    Returns (requests, bytes transferred, bytes to parse, round trips, seconds);
+    assets are counted as one extra round trip because browsers fetch them
+    in parallel once the page has arrived.
+    """
+    started = time.perf_counter()
+    stats = {"requests": 0, "transferred": 0, "parsed": 0}
+    cache = {} if cache is None else cache
+
+    def get(url):
+        entry = cache.get(url)
+        if entry and entry["immutable"]:
+            return None
+        req = urllib.request.Request(url, headers={"Accept-Encoding": accept_encoding})
+        if entry and entry["etag"]:
+            req.add_header("If-None-Match", entry["etag"])
+        elif entry and entry["modified"]:
+            req.add_header("If-Modified-Since", entry["modified"])
+        stats["requests"] += 1
+        try:
+            with urllib.request.urlopen(req) as r:
+                body = r.read()
+                headers = r.headers
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None
+            raise
+        stats["transferred"] += len(body)
+        cache[url] = {
+            "etag": headers.get("ETag"),
+            "modified": headers.get("Last-Modified"),
+            "immutable": "immutable" in (headers.get("Cache-Control") or ""),
+        }
+        if headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        elif headers.get("Content-Encoding") == "br":
+            body = brotli.decompress(body)
+        stats["parsed"] += len(body)
+        return body
+
+    page = get(base + "/")
+    round_trips = 1
+    if page:
+        refs = re.findall(rb'(?:href|src)="([^"]+\.(?:css|js))"', page)
+        fetched = [get(base + "/" + ref.decode()) for ref in refs]
+        if any(body is not None for body in fetched):
+            round_trips += 1
+    return (stats["requests"], stats["transferred"], stats["parsed"], round_trips,
+            time.perf_counter() - started)
+
+def compare(runs=20, link_kbps=1600, rtt_ms=150):
+    """Measure first and repeat visits of index.html vs the built bundle."""
+    build()
+    accept = "br, gzip" if BROTLI_AVAILABLE else "gzip"
+
+    # Today's page as a host that gzips on the fly (e.g. GitHub Pages) would serve it
+    gz_dir = os.path.join(DIST, "_compare")
+    os.makedirs(gz_dir)
+    shutil.copy(TEMPLATE, gz_dir)
+    precompress(os.path.join(gz_dir, "index.html"))
+
+    servers = [
+        ("index.html",        make_server(ROOT, 0, PlainHandler), "identity"),
+        ("index.html gzipped", make_server(gz_dir, 0, quiet=True), accept),
+        ("dist bundle",        make_server(DIST, 0, quiet=True), accept),
+    ]
+    for _, server, _ in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    rows = []
+    try:
+        for label, server, enc in servers:
+            base = "http://127.0.0.1:%d" % server.server_address[1]
+            for visit in ("first", "repeat"):
+                times = []
+                for _ in range(runs):
+                    cache = {}
+                    if visit == "repeat":
+                        fetch_page(base, enc, cache)
+                    requests, size, parsed, trips, secs = fetch_page(base, enc, cache)
+                    times.append(secs)
+                times.sort()
+                # Modelled time on a slow link: the round trips plus the transfer
+                slow = trips * rtt_ms / 1000 + size * 8 / (link_kbps * 1000)
+                rows.append((label, visit, requests, size, parsed,
+                             times[len(times) // 2] * 1000, slow * 1000))
+        # With its service worker installed the bundle's repeat visit is served
+        # from the worker's cache: no requests at all. That needs a browser, so
+        # it is modelled rather than measured.
+        rows.append(("dist + service worker", "repeat", 0, 0, 0, None, 0.0))
+    finally:
+        for _, server, _ in servers:
+            server.shutdown()
+            server.server_close()
+        shutil.rmtree(gz_dir)
+
+    print(f"{'':21} {'visit':6} {'reqs':>4} {'transfer':>8} {'parsed':>7} {'local ms':>8} "
+          f"{'modelled %d kbps/%d ms RTT' % (link_kbps, rtt_ms):>28}")
+    for label, visit, requests, size, parsed, local_ms, slow_ms in rows:
+        local = "-" if local_ms is None else f"{local_ms:.2f}"
+        print(f"{label:21} {visit:6} {requests:4d} {size:8d} {parsed:7d} {local:>8} "
+              f"{slow_ms:25.0f} ms")
+    print("local ms is measured against servers on this machine. The slow-link column is modelled")
+    print("from round trips and bytes, and the service worker row is modelled as zero requests.")
+    return rows
+
+# ── Main ─────────────────────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description="Build and serve the offline web bundle.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="build dist/ from index.html")
+    serve = sub.add_parser("serve", help="serve dist/ with cache headers")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--no-build", action="store_true", help="serve dist/ as it is")
+    cmp_ = sub.add_parser("compare", help="compare load cost of index.html and the bundle")
+    cmp_.add_argument("--runs", type=int, default=20)
+    cmp_.add_argument("--link-kbps", type=int, default=1600)
+    cmp_.add_argument("--rtt-ms", type=int, default=150)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        files = build()
+        for fname in files.values():
+            size = os.path.getsize(os.path.join(DIST, fname))
+            print(f"  dist/{fname:<24} {size:7d} bytes")
+        if not BROTLI_AVAILABLE:
+            print("  (brotli not installed - only .gz files were written)")
+    elif args.command == "serve":
+        if not args.no_build:
+            build()
+        server = make_server(DIST, args.port)
+        print(f"Serving dist/ on http://127.0.0.1:{args.port}/  (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "compare":
+        compare(args.runs, args.link_kbps, args.rtt_ms)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Kiosk soak test - runs thousands of simulated sessions through the Tk app
+in kiosk mode (no speech, no waiting) and fails if Python heap, resident
+memory or thread count keeps growing.
+
+    python soak.py --sessions 5000
+
+Without a display the Tk part is skipped and the shared counting worker is
+soaked on its own (--headless forces this).
+"""
+
+import argparse
+import gc
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+import tkinter as tk
+
+from voice_counter import CountingWorker, VoiceCountingProgram
+
+
+def rss_bytes():
+    """Current resident set size, or None where /proc is not available"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def sample():
+    gc.collect()
+    return {
+        'heap': tracemalloc.get_traced_memory()[0],
+        'rss': rss_bytes(),
+        'threads': threading.active_count(),
+    }
+
+
+def soak_tk(sessions, warmup, samples, stall=10.0):
+    """Run the real app in kiosk mode until ``sessions`` have completed.
+
+    Gives up if no session completes for ``stall`` seconds, e.g. because a
+    stopped job's result was applied to the session that replaced it.
+    """
+    root = tk.Tk()
+    root.withdraw()
+    app = VoiceCountingProgram(root, speech=False, time_scale=0.0, history_file=None)
+    app.start_kiosk(list(range(len(app.presets))), 0)
+
+    visited = 0
+    last_done, last_change = 0, time.monotonic()
+    while app.sessions_completed < sessions:
+        root.update()
+        done = app.sessions_completed
+        if done != last_done:
+            last_done, last_change = done, time.monotonic()
+        elif time.monotonic() - last_change > stall:
+            samples['stalled'] = done
+            break
+        if done >= warmup and 'baseline' not in samples:
+            samples['baseline'] = sample()
+        if done > visited and done % 25 == 0:
+            visited = done
+            # Open settings twice and edit twice: both must reuse their windows
+            app.show_settings()
+            app.show_settings()
+            app.edit_preset_dialog(0, app.settings_window)
+            app.edit_preset_dialog(1, app.settings_window)
+            root.update()
+            app.close_settings()
+            # Interrupt a session and resume the routine, like a user would
+            app.handle_stop()
+            app.kiosk_next()
+
+    samples['final'] = sample()
+    app.close()
+
+
+def soak_headless(sessions, warmup, samples):
+    """Drive the shared counting worker directly"""
+    finished = threading.Event()
+
+    def post(job_id, fields):
+        if 'finished' in fields:
+            finished.set()
+
+    worker = CountingWorker(lambda text: None, post, time_scale=0.0)
+    preset = {"maxCount": 20, "repeatCount": 3, "speed": 2, "interval": 30, "customText": "Set"}
+    for i in range(sessions):
+        if i == warmup:
+            samples['baseline'] = sample()
+        finished.clear()
+        worker.start(preset)
+        if i % 25 == 0:
+            worker.stop()
+        finished.wait()
+    samples['final'] = sample()
+    worker.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test for kiosk mode")
+    parser.add_argument('--sessions', type=int, default=5000)
+    parser.add_argument('--warmup', type=int, default=200,
+                        help="sessions to run before taking the baseline")
+    parser.add_argument('--max-heap-growth-kib', type=int, default=256)
+    parser.add_argument('--max-rss-growth-mib', type=int, default=8)
+    parser.add_argument('--headless', action='store_true',
+                        help="soak the counting worker only, without Tk")
+    args = parser.parse_args()
+    if args.warmup >= args.sessions:
+        parser.error("--warmup must be smaller than --sessions")
+
+    tracemalloc.start()
+    samples = {}
+
+    mode = 'headless'
+    if not args.headless:
+        try:
+            soak_tk(args.sessions, args.warmup, samples)
+            mode = 'tk'
+        except tk.TclError as e:
+            print(f"No display ({e}); soaking the counting worker only")
+    if mode == 'headless':
+        soak_headless(args.sessions, args.warmup, samples)
+
+    if 'stalled' in samples:
+        print(f"FAIL: kiosk stalled after {samples['stalled']} sessions")
+        return 1
+    baseline, final = samples['baseline'], samples['final']
+    heap_growth = final['heap'] - baseline['heap']
+    print(f"{mode}: {args.sessions} sessions")
+    print(f"  heap:    {baseline['heap'] / 1024:.0f} KiB -> {final['heap'] / 1024:.0f} KiB "
+          f"({heap_growth / 1024:+.0f} KiB)")
+    failures = []
+    if heap_growth > args.max_heap_growth_kib * 1024:
+        failures.append("heap grew")
+    if final['rss'] is not None and baseline['rss'] is not None:
+        rss_growth = final['rss'] - baseline['rss']
+        print(f"  rss:     {baseline['rss'] / 2**20:.1f} MiB -> {final['rss'] / 2**20:.1f} MiB "
+              f"({rss_growth / 2**20:+.1f} MiB)")
+        if rss_growth > args.max_rss_growth_mib * 2**20:
+            failures.append("resident memory grew")
+    print(f"  threads: {baseline['threads']} -> {final['threads']}")
+    if final['threads'] > baseline['threads']:
+        failures.append("thread count grew")
+
+    if failures:
+        print("FAIL: " + ", ".join(failures))
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,41 +1,471 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-import pyttsx3
+from tkinter import messagebox, simpledialog
+import argparse
 import json
 import os
+import queue
+import sys
+import csv
 from datetime import datetime, timedelta
 import threading
 import time
 
+# Tempo parsing, scheduling and background speech are shared with the
+# terminal version in the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tempo import (Speaker, compile_schedule, format_tempo, parse_tempo,
+                   short_switch_interval, wait_until)
+
+# Fall back to silent mode when pyttsx3 is missing (kiosk soak runs, CI)
+try:
+    import pyttsx3
+    TTS_AVAILABLE = True
+except ImportError:
+    TTS_AVAILABLE = False
+
+
+def get_numbers_to_say(max_count, speed):
+    """Determine which numbers to say based on speed"""
+    if speed <= 2:
+        return set(range(1, max_count + 1))
+    elif speed <= 4:
+        return set(range(2, max_count + 1, 2))
+    elif speed <= 6:
+        return set(range(3, max_count + 1, 3))
+    else:
+        return set(range(5, max_count + 1, 5))
+
+
+SESSION_FIELDS = ('finished_at', 'patient', 'preset', 'sets', 'reps', 'seconds', 'completed')
+
+
+def log_session(path, preset, completed, counted, seconds, patient=""):
+    """Append a finished (completed or stopped) session to the history CSV read by analytics.py"""
+    row = [datetime.now().isoformat(timespec='seconds'), patient, preset['label'],
+           preset['repeatCount'], counted, round(seconds, 3), int(completed)]
+    try:
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, 'a', newline='') as f:
+            writer = csv.writer(f)
+            if new:
+                writer.writerow(SESSION_FIELDS)
+            writer.writerow(row)
+    except Exception:
+        pass
+
+
+class CountingWorker:
+    """Long-lived counting thread shared by every session.
+
+    Sessions are queued as jobs instead of spawning a thread each time, so a
+    stopped session never leaves a sleeping thread behind. ``post(job_id,
+    fields)`` is called from the worker thread with UI field updates; the
+    receiver is responsible for getting them onto the Tk thread. ``log(preset,
+    completed, counted, seconds)``, if given, is called after every session
+    that got going, also from the worker thread.
+
+    ``speak`` is only ever called from the worker's Speaker thread, so two
+    pyttsx3 run loops can never overlap.
+    """
+
+    def __init__(self, speak, post, time_scale=1.0, log=None):
+        self.speak = speak
+        self.post = post
+        self.log = log
+        self._counted = 0
+        # Multiplies every wait; the soak harness runs with 0
+        self.time_scale = time_scale
+        self._jobs = queue.Queue()
+        self._cancel = threading.Event()
+        self._next_job_id = 0
+        self._speaker = Speaker(speak)
+        self.say_now = self._speaker.say_now
+        self.say_later = self._speaker.say_later
+        self._thread = threading.Thread(target=self._run, name="counting-worker", daemon=True)
+        self._thread.start()
+
+    def start(self, preset):
+        """Cancel any running session and queue a new one, returning its job id"""
+        self._cancel.set()
+        self._cancel = threading.Event()
+        self._next_job_id += 1
+        self._jobs.put((self._next_job_id, dict(preset), self._cancel))
+        return self._next_job_id
+
+    def stop(self):
+        """Cancel the current session; waits wake up immediately"""
+        self._cancel.set()
+
+    def close(self, timeout=2.0):
+        """Stop the worker and speech threads"""
+        self._cancel.set()
+        self._jobs.put(None)
+        self._thread.join(timeout)
+        self._speaker.close(timeout)
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            job_id, preset, cancel = job
+            count = self._count_tempo if preset.get('tempo') else self._count
+            self._counted = 0
+            started = time.monotonic()
+            try:
+                completed = not cancel.is_set() and count(job_id, preset, cancel)
+            except Exception as e:
+                # A bad preset must not take the shared thread down with it
+                self.post(job_id, {'status': f"Error: {e}", 'finished': False})
+                continue
+            self.post(job_id, {'finished': completed})
+            if self.log is not None and (completed or self._counted):
+                self.log(preset, completed, self._counted, time.monotonic() - started)
+            if completed:
+                self.say_later("All complete")
+
+    def _wait(self, cancel, seconds):
+        """Sleep for ``seconds``; returns True if the session was cancelled"""
+        scaled = seconds * self.time_scale
+        if scaled <= 0:
+            return cancel.is_set()
+        return cancel.wait(scaled)
+
+    def _count_tempo(self, job_id, preset, cancel):
+        """Tempo counting loop: events fire at absolute deadlines from a compiled schedule.
+
+        A slow post or speech can delay at most the next event, never shift the
+        rest of the schedule. The GIL switch interval is shortened meanwhile so
+        the Tk thread cannot hold this one off for several 5 ms intervals.
+        The schedule is the same one the terminal version runs (tempo.py).
+        """
+        post = self.post
+        ctext = preset['customText']
+        max_count = preset['maxCount']
+        repeat_count = preset['repeatCount']
+        total_counts = max_count * repeat_count
+        scale = self.time_scale
+        rep_seconds = sum(p['seconds'] for p in preset['tempo']) * scale
+
+        with short_switch_interval():
+            start = time.perf_counter()
+            for ev in compile_schedule(preset):
+                if wait_until(start + ev['at'] * scale, cancel):
+                    return False
+                kind = ev['event']
+                if kind == 'complete':
+                    return True
+
+                now = time.monotonic()
+                rep = ev['set']
+                if kind == 'announce':
+                    post(job_id, {
+                        'repeat': f"{ctext} {rep} of {repeat_count}",
+                        'tick': (ev['completed'], total_counts, now, None),
+                    })
+                    self.say_later(ev['say'])
+                elif kind == 'count':
+                    num = ev['count']
+                    self._counted = ev['completed']
+                    # The ring fills across the rep rather than jumping at its start
+                    post(job_id, {
+                        'count': str(num),
+                        'repeat': f"{ctext} {rep} of {repeat_count} - Count {num} of {max_count}",
+                        'tick': (ev['completed'] - 1, total_counts, now, rep_seconds),
+                    })
+                    self.say_later(ev['say'])
+                elif kind == 'phase':
+                    post(job_id, {'status': f"{ev['phase'].capitalize()} ({ev['seconds']:g}s)"})
+                    if ev['say']:
+                        self.say_later(ev['say'])
+                elif kind == 'rest':
+                    post(job_id, {
+                        'status': "Pausing...",
+                        'tick': (ev['completed'], total_counts, now, None),
+                    })
+            return True
+
+    def _count(self, job_id, preset, cancel):
+        """Main counting loop; returns True when every set was completed"""
+        post = self.post
+        ctext = preset['customText']
+        max_count = preset['maxCount']
+        repeat_count = preset['repeatCount']
+        speed = preset['speed']
+        interval = preset['interval']
+        delay = 1.0 / speed
+        total_counts = max_count * repeat_count
+        # Expected gap between ticks, for the progress ring to interpolate over
+        step = delay * self.time_scale
+
+        numbers_to_say = get_numbers_to_say(max_count, speed)
+
+        for rep in range(repeat_count):
+            if cancel.is_set():
+                return False
+
+            # Announce set
+            post(job_id, {
+                'repeat': f"{ctext} {rep + 1} of {repeat_count}",
+                'tick': (rep * max_count, total_counts, time.monotonic(), step * 2),
+            })
+            self.say_now(f"{ctext} {rep + 1}")
+            if self._wait(cancel, delay * 2):
+                return False
+
+            # Count
+            for num in range(1, max_count + 1):
+                if cancel.is_set():
+                    return False
+
+                completed = (rep * max_count) + num
+                self._counted = completed
+                # The last count of a set is followed by a rest, not another count
+                eta = step if num < max_count else None
+                post(job_id, {
+                    'count': str(num),
+                    'repeat': f"{ctext} {rep + 1} of {repeat_count} - Count {num} of {max_count}",
+                    'status': "Counting...",
+                    'tick': (completed, total_counts, time.monotonic(), eta),
+                })
+
+                if num in numbers_to_say:
+                    self.say_now(num)
+
+                if self._wait(cancel, delay):
+                    return False
+
+            # Pause between sets
+            if rep < repeat_count - 1:
+                post(job_id, {
+                    'status': "Pausing...",
+                    'tick': ((rep + 1) * max_count, total_counts, time.monotonic(), None),
+                })
+                if self._wait(cancel, interval):
+                    return False
+
+        return True
+
+
+class ProgressRing:
+    """Canvas progress ring with the session timer in its centre.
+
+    The counting worker only reports ticks (counts done, when, and how long
+    until the next one). A frame loop on the Tk thread interpolates between
+    ticks from the monotonic clock and touches only the canvas items whose
+    value changed, so the ring moves smoothly however fast or slow the count
+    is. Frames are scheduled on a fixed grid to avoid ``after`` drift, and
+    each frame's cost is measured; if the ring uses more than ``max_load`` of
+    the Tk thread it halves its frame rate, and doubles it again (up to
+    ``fps``) once a window uses less than a quarter of ``max_load``.
+    """
+
+    def __init__(self, parent, size=200, fps=60, max_load=0.1, show_stats=False, bg='white'):
+        self.canvas = tk.Canvas(parent, width=size, height=size, bg=bg, highlightthickness=0)
+        pad = 12
+        box = (pad, pad, size - pad, size - pad)
+        self.canvas.create_oval(*box, outline='#e6e6f5', width=12)
+        self._arc = self.canvas.create_arc(*box, start=90, extent=0, style=tk.ARC,
+                                           outline='#667eea', width=12)
+        self._timer = self.canvas.create_text(size / 2, size / 2 - 10, text="00:00",
+                                              font=("Segoe UI", 26, "bold"), fill='#333')
+        self._percent = self.canvas.create_text(size / 2, size / 2 + 24, text="0%",
+                                                font=("Segoe UI", 12), fill='#999')
+        self._stats = None
+        if show_stats:
+            self._stats = self.canvas.create_text(size / 2, size - 4, text="", anchor=tk.S,
+                                                  font=("Segoe UI", 8), fill='#bbb')
+
+        self.fps = fps
+        self.max_load = max_load
+        self.frame_interval = 1.0 / fps
+        self._after_id = None
+        self._next_frame = 0.0
+        self._shown = {}
+
+        # Session clock and last engine tick
+        self._started_at = None
+        self._stopped_at = None
+        self._completed = 0
+        self._total = 1
+        self._tick_at = 0.0
+        self._tick_eta = None
+
+        # Frame statistics over the current one-second window and the session
+        self._window_start = 0.0
+        self._window_frames = 0
+        self._window_busy = 0.0
+        self.frames = 0
+        self.busy = 0.0
+        self.worst = 0.0
+        self.load = 0.0
+
+    def start(self, total):
+        """Reset for a new session and start animating"""
+        now = time.monotonic()
+        self._started_at = now
+        self._stopped_at = None
+        self._total = max(1, total)
+        self.tick(0, self._total, now, None)
+        self.frame_interval = 1.0 / self.fps
+        self.frames = 0
+        self.busy = 0.0
+        self.worst = 0.0
+        self._window_start = now
+        self._window_frames = 0
+        self._window_busy = 0.0
+        if self._after_id is None:
+            self._next_frame = now
+            self._frame()
+
+    def tick(self, completed, total, at, eta):
+        """Record an engine tick; ``eta`` is the expected wait for the next one (None: hold)"""
+        self._completed = completed
+        self._total = max(1, total)
+        self._tick_at = at
+        self._tick_eta = eta
+
+    def stop(self, completed=False):
+        """Freeze the timer, optionally fill the ring, and stop animating"""
+        if self._started_at is None:
+            return
+        self._stopped_at = time.monotonic()
+        if completed:
+            self.tick(self._total, self._total, self._stopped_at, None)
+        if self._after_id is not None:
+            self.canvas.after_cancel(self._after_id)
+            self._after_id = None
+        self.draw(self._stopped_at)
+
+    def stats(self):
+        """Frame statistics for the current session"""
+        wall = (self._stopped_at or time.monotonic()) - (self._started_at or 0.0)
+        return {
+            'frames': self.frames,
+            'fps': self.frames / wall if wall > 0 else 0.0,
+            'avg_ms': self.busy / self.frames * 1000 if self.frames else 0.0,
+            'worst_ms': self.worst * 1000,
+            'load': self.busy / wall if wall > 0 else 0.0,
+        }
+
+    def _set(self, item, **options):
+        """itemconfigure only when the value differs from what is drawn"""
+        key = (item, tuple(options.items()))
+        if self._shown.get(item) == key:
+            return False
+        self._shown[item] = key
+        self.canvas.itemconfigure(item, **options)
+        return True
+
+    def draw(self, now):
+        """Bring the canvas items up to date for time ``now``; returns True if anything changed"""
+        done = self._completed
+        if self._tick_eta and done < self._total:
+            done += min(1.0, (now - self._tick_at) / self._tick_eta)
+        # Half a degree is below what the eye can see on a tablet-sized ring
+        extent = -round(359.9 * done / self._total * 2) / 2
+        elapsed = int((self._stopped_at or now) - self._started_at)
+        percent = int(self._completed / self._total * 100)
+
+        dirty = self._set(self._arc, extent=extent)
+        dirty |= self._set(self._timer, text=f"{elapsed // 60:02d}:{elapsed % 60:02d}")
+        dirty |= self._set(self._percent, text=f"{percent}%")
+        return dirty
+
+    def _frame(self):
+        start = time.perf_counter()
+        now = time.monotonic()
+        if self.draw(now):
+            # Paint now so the measured cost includes Tk's redraw
+            self.canvas.update_idletasks()
+        cost = time.perf_counter() - start
+
+        self.frames += 1
+        self.busy += cost
+        self.worst = max(self.worst, cost)
+        self._window_frames += 1
+        self._window_busy += cost
+        if now - self._window_start >= 1.0:
+            self._end_window(now)
+
+        # Schedule on a fixed grid; skip frames we are already late for
+        self._next_frame += self.frame_interval
+        if self._next_frame < now:
+            self._next_frame = now + self.frame_interval
+        delay_ms = max(1, int((self._next_frame - time.monotonic()) * 1000))
+        self._after_id = self.canvas.after(delay_ms, self._frame)
+
+    def _end_window(self, now):
+        """Close a one-second statistics window and adapt the frame rate"""
+        wall = now - self._window_start
+        self.load = self._window_busy / wall
+        if self.load > self.max_load and self.frame_interval < 1.0 / 15:
+            self.frame_interval *= 2
+        elif self.load < self.max_load / 4 and self.frame_interval > 1.0 / self.fps:
+            # Doubling roughly doubles the load, so this cannot flip-flop
+            self.frame_interval = max(self.frame_interval / 2, 1.0 / self.fps)
+        if self._stats is not None:
+            fps = self._window_frames / wall
+            avg_ms = self._window_busy / self._window_frames * 1000
+            self._set(self._stats, text=f"{fps:.0f} fps  {avg_ms:.2f} ms  {self.load:.1%} of Tk")
+        self._window_start = now
+        self._window_frames = 0
+        self._window_busy = 0.0
+
+
 class VoiceCountingProgram:
-    def __init__(self, root):
+    def __init__(self, root, speech=True, time_scale=1.0, frame_stats=False,
+                 history_file='voice_counter_sessions.csv', patient=""):
         self.root = root
         self.root.title("Voice Counting Program")
         self.root.geometry("500x700")
         self.root.configure(bg='#667eea')
-        
+
         # Initialize text-to-speech engine
-        self.engine = pyttsx3.init()
-        voices = self.engine.getProperty('voices')
-        # Try to set female voice
-        for voice in voices:
-            if 'female' in voice.name.lower():
-                self.engine.setProperty('voice', voice.id)
-                break
-        self.engine.setProperty('rate', 150)
-        self.engine.setProperty('pitch', 1.2)
-        
+        self.engine = None
+        if speech and TTS_AVAILABLE:
+            try:
+                self.engine = pyttsx3.init()
+                voices = self.engine.getProperty('voices')
+                # Try to set female voice
+                for voice in voices:
+                    if 'female' in voice.name.lower():
+                        self.engine.setProperty('voice', voice.id)
+                        break
+                self.engine.setProperty('rate', 150)
+                self.engine.setProperty('pitch', 1.2)
+            except Exception:
+                self.engine = None
+
         # State variables
         self.is_running = False
         self.running_preset_index = -1
-        self.current_repeat = 0
-        self.current_number = 0
-        self.timer_running = False
-        self.elapsed_time = 0
-        self.start_time = None
-        
+        self.frame_stats = frame_stats
+
+        # Kiosk mode: loop through a routine of preset indices forever
+        self.kiosk_routine = None
+        self.kiosk_rest = 0
+        self._kiosk_position = 0
+        self._kiosk_after_id = None
+        self.sessions_completed = 0
+
+        # Worker -> Tk updates are coalesced into one pending flush
+        self._ui_lock = threading.Lock()
+        self._ui_pending = {}
+        self._ui_flush_scheduled = False
+        self._ui_values = {}
+        self._session_id = 0
+
+        # Dialogs are created once and reused
+        self.settings_window = None
+        self.edit_window = None
+
         # Settings file
         self.settings_file = 'voice_counter_settings.json'
+
+        # Session history for analytics.py (None disables it)
+        self.history_file = history_file
+        self.patient = patient
         
         # Initialize presets
         self.presets = [
@@ -49,7 +479,10 @@ class VoiceCountingProgram:
         
         self.load_settings()
         self.create_widgets()
-        
+
+        self.worker = CountingWorker(self.speak, self.post_ui, time_scale,
+                                     self.record_session if history_file else None)
+
     def load_settings(self):
         """Load settings from file"""
         if os.path.exists(self.settings_file):
@@ -87,20 +520,15 @@ class VoiceCountingProgram:
         # Progress screen (initially hidden)
         self.progress_frame = tk.Frame(container, bg='white')
         
-        # Timer display
-        timer_frame = tk.Frame(self.progress_frame, bg='#f0f0f0')
-        timer_frame.pack(fill=tk.X, padx=20, pady=(20, 10))
-        
-        self.timer_label = tk.Label(timer_frame, text="00:00", 
-                                    font=("Segoe UI", 20, "bold"), 
-                                    bg='#f0f0f0')
-        self.timer_label.pack()
+        # Progress ring with the timer in its centre
+        self.ring = ProgressRing(self.progress_frame, show_stats=self.frame_stats)
+        self.ring.canvas.pack(pady=(20, 0))
         
         # Current count display
         self.count_display = tk.Label(self.progress_frame, text="", 
                                      font=("Segoe UI", 72, "bold"), 
                                      bg='white', fg='#667eea')
-        self.count_display.pack(pady=20)
+        self.count_display.pack(pady=10)
         
         # Status and repeat indicator
         self.status_label = tk.Label(self.progress_frame, text="Ready", 
@@ -113,21 +541,6 @@ class VoiceCountingProgram:
                                     bg='white', fg='#999')
         self.repeat_label.pack(pady=5)
         
-        # Progress bar
-        progress_container = tk.Frame(self.progress_frame, bg='white')
-        progress_container.pack(fill=tk.X, padx=20, pady=20)
-        
-        self.progress_var = tk.DoubleVar()
-        self.progress_bar = ttk.Progressbar(progress_container, 
-                                           variable=self.progress_var, 
-                                           maximum=100)
-        self.progress_bar.pack(fill=tk.X)
-        
-        self.progress_text = tk.Label(progress_container, text="0%", 
-                                     font=("Segoe UI", 12), 
-                                     bg='white')
-        self.progress_text.pack()
-        
         # Control buttons
         button_frame = tk.Frame(self.progress_frame, bg='white')
         button_frame.pack(pady=20)
@@ -193,24 +606,31 @@ class VoiceCountingProgram:
     
     def show_settings(self):
         """Show settings dialog for editing presets"""
+        # Reuse the open window instead of stacking another Toplevel
+        if self.settings_window is not None and self.settings_window.winfo_exists():
+            self.refresh_preset_list()
+            self.settings_window.deiconify()
+            self.settings_window.lift()
+            return
+
         settings_window = tk.Toplevel(self.root)
         settings_window.title("Settings")
         settings_window.geometry("400x500")
         settings_window.configure(bg='white')
+        settings_window.protocol("WM_DELETE_WINDOW", self.close_settings)
+        self.settings_window = settings_window
         
         # List of presets
-        preset_list = tk.Listbox(settings_window, font=("Segoe UI", 12), height=10)
-        preset_list.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
-        
-        for i, preset in enumerate(self.presets):
-            preset_list.insert(tk.END, f"{preset['icon']} {preset['label']} - {preset['maxCount']}x{preset['repeatCount']}")
+        self.preset_list = tk.Listbox(settings_window, font=("Segoe UI", 12), height=10)
+        self.preset_list.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        self.refresh_preset_list()
         
         # Button frame
         btn_frame = tk.Frame(settings_window, bg='white')
         btn_frame.pack(pady=10)
         
         def edit_preset():
-            selection = preset_list.curselection()
+            selection = self.preset_list.curselection()
             if not selection:
                 messagebox.showwarning("Warning", "Please select a preset to edit")
                 return
@@ -220,67 +640,100 @@ class VoiceCountingProgram:
         
         tk.Button(btn_frame, text="Edit", command=edit_preset, 
                  font=("Segoe UI", 12), width=10).pack(side=tk.LEFT, padx=5)
-        tk.Button(btn_frame, text="Close", command=settings_window.destroy, 
+        tk.Button(btn_frame, text="Close", command=self.close_settings, 
                  font=("Segoe UI", 12), width=10).pack(side=tk.LEFT, padx=5)
+
+    def refresh_preset_list(self):
+        """Refill the settings listbox from the presets"""
+        self.preset_list.delete(0, tk.END)
+        for preset in self.presets:
+            self.preset_list.insert(tk.END, f"{preset['icon']} {preset['label']} - {preset['maxCount']}x{preset['repeatCount']}")
+
+    def close_settings(self):
+        """Destroy the settings dialog (and the edit dialog it owns)"""
+        if self.settings_window is not None and self.settings_window.winfo_exists():
+            self.settings_window.destroy()
+        self.settings_window = None
+        self.edit_window = None
     
     def edit_preset_dialog(self, idx, parent):
         """Edit a preset"""
         preset = self.presets[idx]
-        
+        self.editing_index = idx
+
+        if self.edit_window is None or not self.edit_window.winfo_exists():
+            self.create_edit_window(parent)
+
+        self.edit_window.title(f"Edit {preset['label']}")
+        for key, entry in self.edit_entries.items():
+            entry.delete(0, tk.END)
+            if key == 'tempo':
+                entry.insert(0, format_tempo(preset['tempo']) if preset.get('tempo') else "")
+            else:
+                entry.insert(0, str(preset[key]))
+        self.edit_window.deiconify()
+        self.edit_window.lift()
+
+    def create_edit_window(self, parent):
+        """Build the edit dialog once; edit_preset_dialog refills it"""
         edit_window = tk.Toplevel(parent)
-        edit_window.title(f"Edit {preset['label']}")
-        edit_window.geometry("350x400")
+        edit_window.geometry("350x480")
         edit_window.configure(bg='white')
-        
-        # Label
-        tk.Label(edit_window, text="Label:", font=("Segoe UI", 12), 
-                bg='white').pack(pady=(20, 5))
-        label_entry = tk.Entry(edit_window, font=("Segoe UI", 12), width=30)
-        label_entry.insert(0, preset['label'])
-        label_entry.pack()
-        
-        # Max Count
-        tk.Label(edit_window, text="Max Count:", font=("Segoe UI", 12), 
-                bg='white').pack(pady=(10, 5))
-        max_count_entry = tk.Entry(edit_window, font=("Segoe UI", 12), width=30)
-        max_count_entry.insert(0, str(preset['maxCount']))
-        max_count_entry.pack()
-        
-        # Repeat Count
-        tk.Label(edit_window, text="Repeat Count:", font=("Segoe UI", 12), 
-                bg='white').pack(pady=(10, 5))
-        repeat_count_entry = tk.Entry(edit_window, font=("Segoe UI", 12), width=30)
-        repeat_count_entry.insert(0, str(preset['repeatCount']))
-        repeat_count_entry.pack()
-        
-        # Speed
-        tk.Label(edit_window, text="Speed (1-10):", font=("Segoe UI", 12), 
-                bg='white').pack(pady=(10, 5))
-        speed_entry = tk.Entry(edit_window, font=("Segoe UI", 12), width=30)
-        speed_entry.insert(0, str(preset['speed']))
-        speed_entry.pack()
-        
-        # Interval
-        tk.Label(edit_window, text="Interval (seconds):", font=("Segoe UI", 12), 
-                bg='white').pack(pady=(10, 5))
-        interval_entry = tk.Entry(edit_window, font=("Segoe UI", 12), width=30)
-        interval_entry.insert(0, str(preset['interval']))
-        interval_entry.pack()
+        edit_window.protocol("WM_DELETE_WINDOW", edit_window.withdraw)
+        self.edit_window = edit_window
+        self.edit_entries = {}
+
+        fields = [
+            ('label', "Label:"),
+            ('maxCount', "Max Count:"),
+            ('repeatCount', "Repeat Count:"),
+            ('speed', "Speed (1-10):"),
+            ('interval', "Interval (seconds):"),
+            ('tempo', "Tempo (e.g. down:3:Down,hold:1,up:1:Up):"),
+        ]
+        for i, (key, text) in enumerate(fields):
+            tk.Label(edit_window, text=text, font=("Segoe UI", 12), 
+                    bg='white').pack(pady=(20 if i == 0 else 10, 5))
+            entry = tk.Entry(edit_window, font=("Segoe UI", 12), width=30)
+            entry.pack()
+            self.edit_entries[key] = entry
         
         def save_changes():
+            entries = self.edit_entries
             try:
-                self.presets[idx]['label'] = label_entry.get()
-                self.presets[idx]['maxCount'] = int(max_count_entry.get())
-                self.presets[idx]['repeatCount'] = int(repeat_count_entry.get())
-                self.presets[idx]['speed'] = int(speed_entry.get())
-                self.presets[idx]['interval'] = int(interval_entry.get())
-                
-                self.save_settings()
-                self.update_preset_buttons()
-                edit_window.destroy()
-                messagebox.showinfo("Success", "Preset updated successfully!")
+                values = {
+                    'label': entries['label'].get(),
+                    'maxCount': int(entries['maxCount'].get()),
+                    'repeatCount': int(entries['repeatCount'].get()),
+                    'speed': int(entries['speed'].get()),
+                    'interval': int(entries['interval'].get()),
+                }
             except ValueError:
                 messagebox.showerror("Error", "Please enter valid numbers")
+                return
+            limits = {'maxCount': (1, 9999), 'repeatCount': (1, 100),
+                      'speed': (1, 10), 'interval': (0, 600)}
+            for key, (lo, hi) in limits.items():
+                if not lo <= values[key] <= hi:
+                    messagebox.showerror("Error", f"{key} must be between {lo} and {hi}")
+                    return
+            try:
+                tempo_spec = entries['tempo'].get().strip()
+                tempo = parse_tempo(tempo_spec) if tempo_spec else None
+            except ValueError as e:
+                messagebox.showerror("Error", f"Invalid tempo: {e}")
+                return
+
+            self.presets[self.editing_index].update(values)
+            if tempo:
+                self.presets[self.editing_index]['tempo'] = tempo
+            else:
+                self.presets[self.editing_index].pop('tempo', None)
+            self.save_settings()
+            self.update_preset_buttons()
+            self.refresh_preset_list()
+            edit_window.withdraw()
+            messagebox.showinfo("Success", "Preset updated successfully!")
         
         tk.Button(edit_window, text="Save", command=save_changes, 
                  font=("Segoe UI", 12, "bold"), bg='#4CAF50', fg='white',
@@ -297,154 +750,200 @@ class VoiceCountingProgram:
             return
         
         self.running_preset_index = preset_idx
-        self.current_repeat = 0
-        self.current_number = 0
         self.is_running = True
-        self.elapsed_time = 0
-        self.start_time = time.time()
-        
-        # Update UI
-        self.progress_var.set(0)
-        self.progress_text.config(text="0%")
-        self.count_display.config(text="")
-        self.status_label.config(text="Starting...")
         
         preset = self.presets[preset_idx]
-        self.repeat_label.config(text=f"{preset['customText']} 0 of {preset['repeatCount']}")
+
+        # Hand the session to the shared counting thread. Dropping the old
+        # session's queued updates and switching to the new id in one locked
+        # block means nothing posted by the old job can land on this session;
+        # the new job's updates are applied by flush_ui after this returns.
+        with self._ui_lock:
+            self._ui_pending.clear()
+            self._session_id = self.worker.start(preset)
+        self.apply_ui({
+            'count': "",
+            'status': "Starting...",
+            'repeat': f"{preset['customText']} 0 of {preset['repeatCount']}",
+        })
         
         # Show progress screen
         self.show_progress_screen()
         
-        # Start timer
-        self.start_timer()
-        
-        # Start counting in a separate thread
-        count_thread = threading.Thread(target=self.count_loop, daemon=True)
-        count_thread.start()
-    
-    def start_timer(self):
-        """Start the timer"""
-        self.timer_running = True
-        self.update_timer()
-    
-    def update_timer(self):
-        """Update timer display"""
-        if self.timer_running:
-            elapsed = int(time.time() - self.start_time)
-            minutes = elapsed // 60
-            seconds = elapsed % 60
-            self.timer_label.config(text=f"{minutes:02d}:{seconds:02d}")
-            self.root.after(1000, self.update_timer)
-    
-    def stop_timer(self):
-        """Stop the timer"""
-        self.timer_running = False
-    
-    def get_numbers_to_say(self, max_count, speed):
-        """Determine which numbers to say based on speed"""
-        if speed <= 2:
-            return list(range(1, max_count + 1))
-        elif speed <= 4:
-            return list(range(2, max_count + 1, 2))
-        elif speed <= 6:
-            return list(range(3, max_count + 1, 3))
-        else:
-            return list(range(5, max_count + 1, 5))
+        # Start the ring and its session clock
+        self.ring.start(preset['maxCount'] * preset['repeatCount'])
     
     def speak(self, text):
         """Speak text using text-to-speech"""
+        if self.engine is None:
+            return
         try:
             self.engine.say(str(text))
             self.engine.runAndWait()
         except:
             pass
-    
-    def count_loop(self):
-        """Main counting loop"""
-        preset = self.presets[self.running_preset_index]
-        max_count = preset['maxCount']
-        repeat_count = preset['repeatCount']
-        speed = preset['speed']
-        interval = preset['interval']
-        delay = 1.0 / speed
-        
-        numbers_to_say = self.get_numbers_to_say(max_count, speed)
-        
-        for rep in range(repeat_count):
-            if not self.is_running:
+
+    def record_session(self, preset, completed, counted, seconds):
+        """Append a finished session to the history file (worker thread)"""
+        log_session(self.history_file, preset, completed, counted, seconds, self.patient)
+
+    def post_ui(self, job_id, fields):
+        """Queue UI updates from the worker thread.
+
+        Updates are merged into one pending dict and at most one ``after``
+        callback is outstanding, so a fast count does not pile up callbacks.
+        """
+        with self._ui_lock:
+            if job_id != self._session_id:
                 return
-            
-            self.current_repeat = rep
-            
-            # Announce set
-            self.root.after(0, lambda r=rep: self.repeat_label.config(
-                text=f"{preset['customText']} {r + 1} of {repeat_count}"))
-            self.speak(f"{preset['customText']} {rep + 1}")
-            time.sleep(delay * 2)
-            
-            # Count
-            for num in range(1, max_count + 1):
-                if not self.is_running:
-                    return
-                
-                self.current_number = num
-                self.root.after(0, lambda n=num: self.count_display.config(text=str(n)))
-                self.root.after(0, lambda r=rep, n=num: self.repeat_label.config(
-                    text=f"{preset['customText']} {r + 1} of {repeat_count} - Count {n} of {max_count}"))
-                self.root.after(0, lambda: self.status_label.config(text="Counting..."))
-                
-                if num in numbers_to_say:
-                    self.speak(num)
-                
-                # Update progress
-                total_counts = max_count * repeat_count
-                completed_counts = (rep * max_count) + num
-                percentage = int((completed_counts / total_counts) * 100)
-                self.root.after(0, lambda p=percentage: self.progress_var.set(p))
-                self.root.after(0, lambda p=percentage: self.progress_text.config(text=f"{p}%"))
-                
-                time.sleep(delay)
-            
-            # Pause between sets
-            if rep < repeat_count - 1:
-                self.root.after(0, lambda: self.status_label.config(text="Pausing..."))
-                time.sleep(interval)
-        
-        # Finish
-        self.finish()
+            self._ui_pending.update(fields)
+            if self._ui_flush_scheduled:
+                return
+            self._ui_flush_scheduled = True
+        self.root.after(0, self.flush_ui)
+
+    def flush_ui(self):
+        """Apply pending worker updates on the Tk thread"""
+        with self._ui_lock:
+            fields = self._ui_pending
+            self._ui_pending = {}
+            self._ui_flush_scheduled = False
+        finished = fields.pop('finished', None)
+        self.apply_ui(fields)
+        if finished is not None:
+            self.finish(finished)
+
+    def apply_ui(self, fields):
+        """Configure only the widgets whose value changed"""
+        targets = {
+            'count': self.count_display,
+            'status': self.status_label,
+            'repeat': self.repeat_label,
+        }
+        values = self._ui_values
+        for key, value in fields.items():
+            if values.get(key) == value:
+                continue
+            values[key] = value
+            if key == 'tick':
+                self.ring.tick(*value)
+            else:
+                targets[key].config(text=value)
     
-    def finish(self):
-        """Complete the exercise"""
+    def finish(self, completed=True):
+        """Complete the exercise (runs on the Tk thread)"""
+        if not self.is_running:
+            return
         self.is_running = False
         self.running_preset_index = -1
-        self.stop_timer()
-        
-        self.root.after(0, lambda: self.count_display.config(text="✓"))
-        self.root.after(0, lambda: self.status_label.config(text="Completed!"))
-        self.root.after(0, lambda: self.repeat_label.config(text="All steps complete!"))
-        self.root.after(0, lambda: self.progress_var.set(100))
-        self.root.after(0, lambda: self.progress_text.config(text="100%"))
-        
-        self.speak("All complete")
+        self.ring.stop(completed)
+        self.report_frame_stats()
+
+        if not completed:
+            return
+
+        self.sessions_completed += 1
+        self.apply_ui({
+            'count': "✓",
+            'status': "Completed!",
+            'repeat': "All steps complete!",
+        })
+
+        if self.kiosk_routine:
+            self._kiosk_after_id = self.root.after(int(self.kiosk_rest * 1000), self.kiosk_next)
+
+    def report_frame_stats(self):
+        """With --frame-stats, print the ring's cost over the session that just ended"""
+        if not self.frame_stats:
+            return
+        stats = self.ring.stats()
+        print(f"ring: {stats['frames']} frames, {stats['fps']:.0f} fps, "
+              f"avg {stats['avg_ms']:.2f} ms, worst {stats['worst_ms']:.2f} ms, "
+              f"{stats['load']:.1%} of Tk thread", file=sys.stderr)
+
+    def start_kiosk(self, routine, rest):
+        """Loop through ``routine`` (preset indices), resting ``rest`` seconds between sessions"""
+        self.kiosk_routine = routine
+        self.kiosk_rest = rest
+        self._kiosk_position = 0
+        self.kiosk_next()
+
+    def kiosk_next(self):
+        """Start the next preset of the kiosk routine"""
+        self._kiosk_after_id = None
+        idx = self.kiosk_routine[self._kiosk_position % len(self.kiosk_routine)]
+        self._kiosk_position += 1
+        self.start_exercise(idx)
     
     def handle_stop(self):
         """Stop the current exercise"""
+        was_running = self.is_running
         self.is_running = False
         self.running_preset_index = -1
-        self.stop_timer()
+        self.ring.stop()
+        if was_running:
+            self.report_frame_stats()
+        # Ignore anything the cancelled job still posts, including its 'finished'
+        with self._ui_lock:
+            self._session_id = None
+            self._ui_pending.clear()
+        self.worker.stop()
+
+        # A stop pauses the kiosk loop until the next preset is picked
+        if self._kiosk_after_id is not None:
+            self.root.after_cancel(self._kiosk_after_id)
+            self._kiosk_after_id = None
         
-        self.count_display.config(text="■")
-        self.status_label.config(text="Stopped")
+        self.apply_ui({'count': "■", 'status': "Stopped"})
         
         # Stop speech
-        try:
-            self.engine.stop()
-        except:
-            pass
+        if self.engine is not None:
+            try:
+                self.engine.stop()
+            except:
+                pass
+
+    def close(self):
+        """Shut down the worker thread and the window"""
+        self.handle_stop()
+        self.worker.close()
+        self.root.destroy()
+
+def parse_routine(text, preset_count):
+    """Parse a comma separated list of 1-based preset numbers"""
+    routine = []
+    for part in text.split(','):
+        idx = int(part) - 1
+        if not 0 <= idx < preset_count:
+            raise argparse.ArgumentTypeError(f"preset {part} does not exist")
+        routine.append(idx)
+    return routine
 
 def main():
+    parser = argparse.ArgumentParser(description="Voice Counting Program")
+    parser.add_argument('--kiosk', action='store_true',
+                        help="fullscreen mode that loops through a routine of presets")
+    parser.add_argument('--routine', default=None,
+                        help="comma separated preset numbers for kiosk mode (default: all)")
+    parser.add_argument('--kiosk-rest', type=float, default=10,
+                        help="seconds between kiosk sessions (default: 10)")
+    parser.add_argument('--patient', default="",
+                        help="patient id recorded in the session history")
+    parser.add_argument('--frame-stats', action='store_true',
+                        help="show the progress ring's frame rate and Tk thread load")
+    args = parser.parse_args()
+
     root = tk.Tk()
-    app = VoiceCountingProgram(root)
+    app = VoiceCountingProgram(root, frame_stats=args.frame_stats, patient=args.patient)
+    if args.kiosk:
+        try:
+            routine = (parse_routine(args.routine, len(app.presets)) if args.routine
+                       else list(range(len(app.presets))))
+        except (ValueError, argparse.ArgumentTypeError) as e:
+            parser.error(f"invalid --routine: {e}")
+        root.attributes('-fullscreen', True)
+        app.start_kiosk(routine, args.kiosk_rest)
+    root.protocol("WM_DELETE_WINDOW", app.close)
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,180 @@
+"""
+Tempo presets, shared by the terminal counter (voice_counter.py) and the Tk
+counter (python/voice_counter.py).
+
+A preset with a "tempo" list, e.g.
+    [{"name": "down", "seconds": 3, "cue": "Down"}, {"name": "hold", "seconds": 1},
+     {"name": "up", "seconds": 1, "cue": "Up"}]
+counts each rep through those phases instead of using "speed". The preset is
+compiled into a schedule of events at fixed offsets, which a frontend fires
+at absolute deadlines with wait_until(), speaking through a Speaker so that
+TTS never delays the schedule.
+"""
+
+import contextlib
+import queue
+import sys
+import threading
+import time
+
+TEMPO_LEAD_IN   = 2.0     # seconds between a set announcement and its first rep
+SPIN_WINDOW     = 0.0005  # the last stretch before a deadline is busy-waited
+SWITCH_INTERVAL = 0.0005  # GIL switch interval while a schedule runs
+
+# ── Parsing ───────────────────────────────────────────────────────────────────
+def parse_tempo(spec):
+    """Parse "down:3:Down,hold:1,up:1:Up" (name:seconds[:cue]) into phases."""
+    phases = []
+    for part in spec.split(","):
+        fields = [f.strip() for f in part.split(":")]
+        if len(fields) not in (2, 3) or not fields[0]:
+            raise ValueError(f"bad phase {part.strip()!r}, expected name:seconds[:cue]")
+        try:
+            seconds = float(fields[1])
+        except ValueError:
+            raise ValueError(f"bad duration in phase {part.strip()!r}")
+        if not 0.01 <= seconds <= 60:
+            raise ValueError(f"phase {fields[0]!r} must last 0.01-60 seconds")
+        phase = {"name": fields[0], "seconds": seconds}
+        if len(fields) == 3 and fields[2]:
+            phase["cue"] = fields[2]
+        phases.append(phase)
+    return phases
+
+def format_tempo(phases):
+    return ",".join(f"{p['name']}:{p['seconds']:g}" + (f":{p['cue']}" if p.get("cue") else "")
+                    for p in phases)
+
+# ── Schedule ──────────────────────────────────────────────────────────────────
+def compile_schedule(preset):
+    """Expand a tempo preset into events, each with its offset ("at") from the start.
+
+    Every event has "event", "progress" (percent), "completed" (counts done),
+    "sets" and "say" (text to speak, or None); announce, count, phase and rest
+    events also carry their "set". Rests are one event per second, with the
+    seconds "remaining".
+    """
+    m        = preset["maxCount"]
+    n        = preset["repeatCount"]
+    interval = preset["interval"]
+    ctext    = preset["customText"]
+    phases   = preset["tempo"]
+    total    = m * n
+    events   = []
+    # Offsets are summed in integer microseconds so they never accumulate error
+    at_us    = 0
+
+    def add(event, completed, **fields):
+        events.append({"at": at_us / 1e6, "event": event,
+                       "progress": int(completed / total * 100) if total else 100,
+                       "completed": completed, "sets": n, **fields})
+
+    for rep in range(1, n + 1):
+        done = (rep - 1) * m
+        add("announce", done, set=rep, say=f"{ctext} {rep}")
+        at_us += round(TEMPO_LEAD_IN * 1e6)
+        for num in range(1, m + 1):
+            add("count", done + num, set=rep, count=num, reps=m, say=num)
+            for p in phases:
+                add("phase", done + num, set=rep, count=num, phase=p["name"],
+                    seconds=p["seconds"], say=p.get("cue"))
+                at_us += round(p["seconds"] * 1e6)
+        if rep < n:
+            for remaining in range(interval, 0, -1):
+                add("rest", done + m, set=rep, remaining=remaining, say=None)
+                at_us += 1000000
+    add("complete", total, counted=total, say="All complete")
+    return events
+
+# ── Timing ────────────────────────────────────────────────────────────────────
+def wait_until(deadline, stop_flag):
+    """Sleep until perf_counter() reaches ``deadline``; True if stopped first.
+
+    Event.wait covers all but the last SPIN_WINDOW, which is busy-waited so
+    the wake-up is not at the mercy of timer slack. The spin still hands the
+    GIL over every switch interval, hence short_switch_interval().
+    """
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining > SPIN_WINDOW:
+            if stop_flag.wait(remaining - SPIN_WINDOW):
+                return True
+        else:
+            while time.perf_counter() < deadline:
+                pass
+            return stop_flag.is_set()
+
+@contextlib.contextmanager
+def short_switch_interval():
+    """Shorten the GIL switch interval while a schedule runs.
+
+    With the default 5 ms a busy thread (TTS, UI) can keep the scheduling
+    thread from waking for several switch intervals.
+    """
+    old_interval = sys.getswitchinterval()
+    sys.setswitchinterval(min(old_interval, SWITCH_INTERVAL))
+    try:
+        yield
+    finally:
+        sys.setswitchinterval(old_interval)
+
+# ── Speech ────────────────────────────────────────────────────────────────────
+class Speaker:
+    """One long-lived thread that does all the speaking.
+
+    ``speak`` is only ever called from this thread, so two pyttsx3 run loops
+    never overlap, and a schedule can queue phrases without waiting for TTS.
+    """
+
+    def __init__(self, speak):
+        self.speak = speak
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="speech", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                text, due, max_delay, done = item
+                try:
+                    if max_delay is None or time.perf_counter() - due <= max_delay:
+                        self.speak(text)
+                except Exception:
+                    pass
+                finally:
+                    if done is not None:
+                        done.set()
+            finally:
+                self._queue.task_done()
+
+    def say_now(self, text):
+        """Speak and wait until it has been said."""
+        done = threading.Event()
+        self._queue.put((text, time.perf_counter(), None, done))
+        done.wait()
+
+    def say_later(self, text, max_delay=1.0):
+        """Queue speech without waiting.
+
+        Phrases still queued ``max_delay`` seconds after they were due are
+        dropped, so speech cannot drift behind the schedule.
+        """
+        self._queue.put((text, time.perf_counter(), max_delay, None))
+
+    def flush(self, timeout=5.0):
+        """Wait up to ``timeout`` seconds for everything queued to be spoken."""
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                self._queue.all_tasks_done.wait(remaining)
+
+    def close(self, timeout=2.0):
+        """Stop the speech thread once the phrases queued so far are done."""
+        self._queue.put(None)
+        self._thread.join(timeout)
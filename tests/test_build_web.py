@@ -0,0 +1,84 @@
+"""The web bundle's minifiers must only drop comments and whitespace."""
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import build_web  # noqa: E402
+from build_web import minify_css, minify_js  # noqa: E402
+
+NODE = shutil.which("node")
+needs_node = pytest.mark.skipif(NODE is None, reason="node is not installed")
+
+# Snippets that print something, so source and minified output can be compared
+JS_PROGRAMS = [
+    "const f = (o, s) => o.a + s;\nconst s = `${ f({a: 1}, `x   y`) }`;\nconsole.log(s)",
+    "const o = {k: 'v'};\nconsole.log(`a ${ `b ${ o['k'] } c` }   d ${ {x: '}'}.x }`)",
+    "let a = 1, b = 2\nlet c = a + +b\nlet d = a - -b\nconsole.log(c, d)",
+    "// comment\nlet x = 10 /* inline */ / 2 / 1\nconsole.log(x)",
+    "const r = /[/]\\/ +x/g;\nconsole.log('a/ /x'.replace(r, '-'))",
+    "function g() {\n  return\n  1\n}\nconsole.log(g())",
+    "let s = 'it\\'s   \"spaced\"  '\nconsole.log(s, \"a  // not a comment\")",
+    "let i = 0\ni\n++\ni\nconsole.log(i)",
+]
+
+
+def run_js(source):
+    result = subprocess.run([NODE, "-e", source], capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def test_minify_js_keeps_template_expressions_whole():
+    source = "s = `${ f({a: 1}, `x   y`) }`"
+    assert minify_js(source) == "s=" + source[4:]
+
+
+def test_minify_js_strips_comments_and_indentation():
+    source = "function f(a,  b) {\n    // sum\n    return a + b; /* done */\n}\n"
+    assert minify_js(source) == "function f(a,b){\nreturn a+b;\n}"
+
+
+def test_minify_js_keeps_strings_and_regexes():
+    source = "x = '  a // b  ' + \"/* c */\"\ny = /a  b\\/c/gi.test(x)"
+    assert minify_js(source) == "x='  a // b  '+\"/* c */\"\ny=/a  b\\/c/gi.test(x)"
+
+
+def test_minify_js_keeps_unary_spacing():
+    assert minify_js("a + +b - -c") == "a+ +b- -c"
+
+
+@needs_node
+@pytest.mark.parametrize("source", JS_PROGRAMS)
+def test_minify_js_behaves_like_source(source):
+    assert run_js(minify_js(source)) == run_js(source)
+
+
+@needs_node
+def test_minified_app_script_parses(tmp_path):
+    with open(build_web.TEMPLATE, encoding="utf-8") as f:
+        _, script, _, _ = build_web.split_template(f.read())
+    path = tmp_path / "app.js"
+    path.write_text(minify_js(script), encoding="utf-8")
+    result = subprocess.run([NODE, "--check", str(path)], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_minify_css_drops_comments_and_whitespace():
+    source = "/* theme */\n.a {\n  color: red;\n  margin: 0 auto;\n}\n\n.b > .c { top: 0 }\n"
+    assert minify_css(source) == ".a{color:red;margin:0 auto}.b>.c{top:0}"
+
+
+def test_minify_css_keeps_descendant_space_before_colon():
+    assert minify_css(".a :hover { x: 1 }") == ".a :hover{x:1}"
+
+
+def test_minify_css_keeps_strings():
+    source = '.q::before { content: "  a ; }  "; font-family: \'Segoe  UI\' }'
+    assert minify_css(source) == '.q::before{content:"  a ; }  ";font-family:\'Segoe  UI\'}'
@@ -0,0 +1,102 @@
+"""Phase-boundary timing of both frontends' tempo paths under GIL contention."""
+
+import importlib.util
+import io
+import json
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import voice_counter as terminal  # noqa: E402
+
+# The Tk app is also called voice_counter, so load it under another name
+_spec = importlib.util.spec_from_file_location(
+    "tk_voice_counter", os.path.join(ROOT, "python", "voice_counter.py"))
+tk_app = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(tk_app)
+
+# The requirement is sub-10 ms jitter; single boundaries may exceed it when
+# the OS schedules something else, so the worst case gets a noise ceiling
+P99_LIMIT_MS = 10
+MAX_LIMIT_MS = 25
+
+
+def check_lateness(lateness):
+    ms = sorted(x * 1000 for x in lateness)
+    assert terminal.percentile(ms, 99) < P99_LIMIT_MS
+    assert ms[-1] < MAX_LIMIT_MS
+
+TEMPO = [{"name": "down", "seconds": 0.03, "cue": "Down"},
+         {"name": "hold", "seconds": 0.02},
+         {"name": "up", "seconds": 0.02, "cue": "Up"}]
+PRESET = {"label": "Tempo test", "maxCount": 15, "repeatCount": 2, "speed": 1,
+          "interval": 0, "customText": "Set", "tempo": TEMPO}
+
+
+def test_frontends_share_one_schedule():
+    for name in ("parse_tempo", "format_tempo", "compile_schedule", "wait_until"):
+        assert getattr(tk_app, name) is getattr(terminal, name)
+
+
+class BusyThread:
+    """A Python thread competing for the GIL, like TTS or UI work would."""
+
+    def __enter__(self):
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=terminal._burn, args=(self.stop,), daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
+
+
+def test_run_handler_phase_boundaries():
+    out = io.StringIO()
+    lateness = []
+    with BusyThread():
+        done = terminal.run_schedule(terminal.compile_schedule(PRESET), threading.Event(),
+                                     terminal.run_event_writer(PRESET, out, tts=False),
+                                     lateness)
+    assert done
+    events = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert sum(ev["event"] == "count" for ev in events) == 30
+    assert sum(ev["event"] == "phase" for ev in events) == 90
+    assert events[-1]["event"] == "complete" and events[-1]["counted"] == 30
+    check_lateness(lateness)
+
+
+def test_tk_worker_phase_boundaries():
+    posts = []
+    spoken = []
+    finished = threading.Event()
+
+    def post(job_id, fields):
+        posts.append((time.perf_counter(), fields))
+        if "finished" in fields:
+            finished.set()
+
+    worker = tk_app.CountingWorker(spoken.append, post)
+    try:
+        with BusyThread():
+            worker.start(PRESET)
+            assert finished.wait(10)
+        # "All complete" goes through the speech thread, after the last cue
+        deadline = time.monotonic() + 2
+        while "All complete" not in spoken and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        worker.close()
+
+    assert posts[-1][1] == {"finished": True}
+    # Every scheduled event but 'complete' posts exactly once, in order
+    schedule = tk_app.compile_schedule(PRESET)[:-1]
+    times = [t for t, _ in posts[:-1]]
+    assert len(times) == len(schedule)
+    check_lateness([(t - times[0]) - ev["at"] for t, ev in zip(times, schedule)])
+    assert spoken[-1] == "All complete"
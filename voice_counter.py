@@ -7,9 +7,17 @@ Works without a graphical display environment.
 import time
 import json
 import os
+import csv
+from datetime import datetime
 import sys
+import signal
+import argparse
 import threading
 
+# Tempo parsing, scheduling and background speech are shared with the Tk app
+from tempo import (Speaker, compile_schedule, format_tempo, parse_tempo,
+                   short_switch_interval, wait_until)
+
 # ── Try to import pyttsx3, fall back to print-only mode ──────────────────────
 try:
     import pyttsx3
@@ -29,6 +37,8 @@ WHITE  = "\033[97m"
 DIM    = "\033[2m"
 
 SETTINGS_FILE = "voice_counter_settings.json"
+SESSIONS_FILE = "voice_counter_sessions.csv"
+SESSION_FIELDS = ("finished_at", "patient", "preset", "sets", "reps", "seconds", "completed")
 
 DEFAULT_PRESETS = [
     {"label": "Push-ups",      "icon": "💪", "maxCount": 20, "repeatCount": 3, "speed": 2, "interval": 30, "customText": "Set"},
@@ -60,6 +70,10 @@ def _init_tts():
 def speak(text):
     """Speak text aloud."""
     print(f"  {CYAN}🔊 {text}{RESET}")
+    say(text)
+
+def say(text):
+    """Speak text without echoing it to the terminal."""
     if not TTS_AVAILABLE or _engine is None:
         return
     try:
@@ -68,6 +82,30 @@ def speak(text):
     except Exception:
         pass
 
+_speaker = None
+
+def say_later(text, max_delay=1.0):
+    """Speak on the background speech thread so tempo timing never waits for TTS.
+
+    Phrases still queued ``max_delay`` seconds after they were due are
+    dropped, so speech cannot drift behind the schedule.
+    """
+    global _speaker
+    if not TTS_AVAILABLE or _engine is None:
+        return
+    if _speaker is None:
+        _speaker = Speaker(say)
+    _speaker.say_later(text, max_delay)
+
+def flush_speech(timeout=5.0):
+    """Wait up to ``timeout`` seconds for background speech to be spoken.
+
+    The speech thread is a daemon, so without this a process that exits right
+    after its last event would cut off phrases still queued, like "All complete".
+    """
+    if _speaker is not None:
+        _speaker.flush(timeout)
+
 # ── Settings ──────────────────────────────────────────────────────────────────
 def load_presets():
     if os.path.exists(SETTINGS_FILE):
@@ -86,6 +124,26 @@ def save_presets(presets):
     except Exception:
         pass
 
+def log_session(preset, final_event, patient="", path=SESSIONS_FILE):
+    """Append a finished (completed or stopped) session to the history CSV read by analytics.py.
+    Sessions stopped before the first count are not recorded."""
+    if final_event["event"] != "complete" and not final_event["counted"]:
+        return
+    row = [
+        datetime.now().isoformat(timespec="seconds"), patient, preset["label"],
+        preset["repeatCount"], final_event["counted"], final_event["elapsed"],
+        int(final_event["event"] == "complete"),
+    ]
+    try:
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, "a", newline="") as f:
+            writer = csv.writer(f)
+            if new:
+                writer.writerow(SESSION_FIELDS)
+            writer.writerow(row)
+    except Exception:
+        pass
+
 # ── UI Helpers ────────────────────────────────────────────────────────────────
 def clear():
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -115,6 +173,51 @@ def input_int(prompt, default, lo, hi):
         except ValueError:
             print(f"  {YELLOW}Please enter a number.{RESET}")
 
+# ── Tempo ─────────────────────────────────────────────────────────────────────
+def run_schedule(schedule, stop_flag, on_event, lateness=None):
+    """Emit compiled events at their offsets on the monotonic clock.
+
+    Deadlines are absolute, so a slow ``on_event`` delays at most the event
+    after it and never shifts the rest of the schedule. Each event gets its
+    scheduled time as "due"; how late it fired is appended to ``lateness``.
+
+    While it runs the GIL switch interval is shortened (see tempo.py).
+    """
+    with short_switch_interval():
+        start = time.perf_counter()
+        progress = 0
+        counted = 0
+        for ev in schedule:
+            if wait_until(start + ev["at"], stop_flag):
+                on_event({"event": "stop", "elapsed": round(time.perf_counter() - start, 3),
+                          "progress": progress, "sets": ev["sets"], "counted": counted,
+                          "say": None})
+                return False
+            now = time.perf_counter()
+            if lateness is not None:
+                lateness.append(now - start - ev["at"])
+            progress = ev["progress"]
+            if ev["event"] == "count":
+                counted += 1
+            fields = {k: v for k, v in ev.items() if k != "at"}
+            on_event({**fields, "elapsed": round(now - start, 3), "due": ev["at"]})
+        return True
+
+def input_tempo(current):
+    """Ask for a tempo spec; Enter keeps ``current``, "-" removes it."""
+    shown = format_tempo(current) if current else "none"
+    print(f"  {DIM}Tempo: name:seconds[:cue],...  e.g. down:3:Down,hold:1,up:1:Up  (- for none){RESET}")
+    while True:
+        raw = input(f"  Tempo         [{shown}]: ").strip()
+        if raw == "":
+            return current
+        if raw == "-":
+            return None
+        try:
+            return parse_tempo(raw)
+        except ValueError as e:
+            print(f"  {YELLOW}{e}.{RESET}")
+
 # ── Counting Engine ───────────────────────────────────────────────────────────
 def get_numbers_to_say(max_count, speed):
     if speed <= 2:
@@ -126,19 +229,87 @@ def get_numbers_to_say(max_count, speed):
     else:
         return set(range(5, max_count + 1, 5))
 
-def run_exercise(preset):
-    """Run a single preset exercise with live terminal output."""
+def run_session(preset, stop_flag, on_event):
+    """Run the counting schedule for one preset, reporting each step.
+
+    ``on_event`` is called with a dict for every announcement, count, rest
+    second and the final completion or stop; its ``say`` field holds the text
+    to speak (or None). Speaking and drawing are left to the caller, so the
+    interactive screen and ``run`` share the same timing. Returns True when
+    every set was completed.
+
+    Tempo presets run from a compiled schedule instead and also report a
+    "phase" event at every phase boundary; see run_schedule().
+    """
+    if preset.get("tempo"):
+        return run_schedule(compile_schedule(preset), stop_flag, on_event)
+
     m          = preset["maxCount"]
     n          = preset["repeatCount"]
     speed      = preset["speed"]
     interval   = preset["interval"]
-    label      = preset["label"]
-    icon       = preset["icon"]
     ctext      = preset["customText"]
     delay      = 1.0 / speed
     to_say     = get_numbers_to_say(m, speed)
+    start_time = time.time()
+
+    total_counts = m * n
+    completed    = 0
+
+    def emit(event, **fields):
+        on_event({
+            "event": event,
+            "elapsed": round(time.time() - start_time, 3),
+            "progress": int(completed / total_counts * 100),
+            **fields,
+        })
+
+    for rep in range(1, n + 1):
+        if stop_flag.is_set():
+            break
+
+        emit("announce", set=rep, sets=n, say=f"{ctext} {rep}")
+        if stop_flag.wait(delay * 2):
+            break
+
+        for num in range(1, m + 1):
+            if stop_flag.is_set():
+                break
+
+            completed += 1
+            emit("count", set=rep, sets=n, count=num, reps=m,
+                 say=num if num in to_say else None)
+
+            if stop_flag.wait(delay):
+                break
+
+        if stop_flag.is_set():
+            break
+
+        # Rest between sets
+        if rep < n:
+            for remaining in range(interval, 0, -1):
+                emit("rest", set=rep, sets=n, remaining=remaining, say=None)
+                if stop_flag.wait(1):
+                    break
+
+    done = completed >= total_counts
+    if done:
+        emit("complete", sets=n, counted=completed, say="All complete")
+    else:
+        emit("stop", sets=n, counted=completed, say=None)
+    return done
+
+def run_exercise(preset):
+    """Run a single preset exercise with live terminal output."""
+    n          = preset["repeatCount"]
+    label      = preset["label"]
+    icon       = preset["icon"]
+    ctext      = preset["customText"]
     stop_flag  = threading.Event()
     start_time = time.time()
+    # Tempo timing must not wait for speech
+    speak_now  = say_later if preset.get("tempo") else speak
 
     # Key-press listener (press Q to stop)
     def key_listener():
@@ -176,71 +347,254 @@ def run_exercise(preset):
         print()
         print(f"  {DIM}Press  Q  to stop{RESET}\n")
 
-    total_counts = m * n
-    completed    = 0
-
-    for rep in range(1, n + 1):
-        if stop_flag.is_set():
-            break
-
-        pct = int(completed / total_counts * 100)
-        redraw(rep, "", f"Starting {ctext} {rep}...", pct)
-        speak(f"{ctext} {rep}")
-        time.sleep(delay * 2)
-
-        for num in range(1, m + 1):
-            if stop_flag.is_set():
-                break
-
-            completed += 1
-            pct = int(completed / total_counts * 100)
-            redraw(rep, num, "Counting...", pct)
-
-            if num in to_say:
-                speak(num)
-
-            time.sleep(delay)
-
-        if stop_flag.is_set():
-            break
-
-        # Rest between sets
-        if rep < n:
-            for remaining in range(interval, 0, -1):
-                if stop_flag.is_set():
-                    break
-                clear()
-                elapsed = int(time.time() - start_time)
-                print_header(f"{icon}  {label}")
-                print(f"  {BOLD}Timer:{RESET}   {CYAN}{fmt_time(elapsed)}{RESET}")
-                print(f"  {BOLD}Status:{RESET}  {YELLOW}Rest — next {ctext} in {remaining}s{RESET}")
-                print(f"  {BOLD}{ctext}:{RESET}   {WHITE}{rep} / {n}  completed{RESET}")
-                print()
-                print(f"  {bar(int(completed / total_counts * 100))}")
-                print()
-                print(f"  {DIM}Press  Q  to stop{RESET}\n")
-                time.sleep(1)
-
+    def on_event(ev):
+        kind = ev["event"]
+        if kind == "announce":
+            redraw(ev["set"], "", f"Starting {ctext} {ev['set']}...", ev["progress"])
+        elif kind == "count":
+            redraw(ev["set"], ev["count"], "Counting...", ev["progress"])
+        elif kind == "phase":
+            redraw(ev["set"], ev["count"], f"{ev['phase'].capitalize()}  ({ev['seconds']:g}s)",
+                   ev["progress"])
+        elif kind == "rest":
+            clear()
+            elapsed = int(time.time() - start_time)
+            print_header(f"{icon}  {label}")
+            print(f"  {BOLD}Timer:{RESET}   {CYAN}{fmt_time(elapsed)}{RESET}")
+            print(f"  {BOLD}Status:{RESET}  {YELLOW}Rest — next {ctext} in {ev['remaining']}s{RESET}")
+            print(f"  {BOLD}{ctext}:{RESET}   {WHITE}{ev['set']} / {n}  completed{RESET}")
+            print()
+            print(f"  {bar(ev['progress'])}")
+            print()
+            print(f"  {DIM}Press  Q  to stop{RESET}\n")
+        elif kind == "complete":
+            clear()
+            elapsed = int(time.time() - start_time)
+            print_header(f"{icon}  {label}")
+            print(f"  {BOLD}Timer:{RESET}   {CYAN}{fmt_time(elapsed)}{RESET}")
+            print(f"  {BOLD}{GREEN}✓  Workout complete!{RESET}")
+            print(f"  {BOLD}{ctext}s:{RESET}  {WHITE}{n} / {n}{RESET}")
+            print()
+            print(f"  {bar(100)}")
+            print()
+        elif kind == "stop":
+            clear()
+            print_header(f"{icon}  {label}")
+            print(f"  {RED}■  Stopped.{RESET}\n")
+        if ev["say"] is not None:
+            speak_now(ev["say"])
+        if kind in ("complete", "stop"):
+            log_session(preset, ev)
+
+    run_session(preset, stop_flag, on_event)
     stop_flag.set()
-
-    # Final screen
-    if completed >= total_counts:
-        clear()
-        elapsed = int(time.time() - start_time)
-        print_header(f"{icon}  {label}")
-        print(f"  {BOLD}Timer:{RESET}   {CYAN}{fmt_time(elapsed)}{RESET}")
-        print(f"  {BOLD}{GREEN}✓  Workout complete!{RESET}")
-        print(f"  {BOLD}{ctext}s:{RESET}  {WHITE}{n} / {n}{RESET}")
-        print()
-        print(f"  {bar(100)}")
-        print()
-        speak("All complete")
-        input(f"\n  {DIM}Press Enter to return to the menu...{RESET}")
-    else:
-        clear()
-        print_header(f"{icon}  {label}")
-        print(f"  {RED}■  Stopped.{RESET}\n")
-        input(f"\n  {DIM}Press Enter to return to the menu...{RESET}")
+    input(f"\n  {DIM}Press Enter to return to the menu...{RESET}")
+
+# ── Non-interactive Run ───────────────────────────────────────────────────────
+EXIT_COMPLETE = 0
+EXIT_STOPPED  = 3
+
+def find_preset(presets, key):
+    """Look a preset up by 1-based index or (case-insensitive) label."""
+    if key.isdigit():
+        idx = int(key) - 1
+        if 0 <= idx < len(presets):
+            return presets[idx]
+    for p in presets:
+        if p["label"].lower() == key.lower():
+            return p
+    return None
+
+def bounded_int(lo, hi):
+    def parse(raw):
+        try:
+            val = int(raw)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"{raw!r} is not a number")
+        if not lo <= val <= hi:
+            raise argparse.ArgumentTypeError(f"must be between {lo} and {hi}")
+        return val
+    return parse
+
+def run_command(args):
+    """`run`: count one preset with no screen control, streaming JSON lines."""
+    presets = load_presets()
+    preset = find_preset(presets, args.preset)
+    if preset is None:
+        print(f"Unknown preset {args.preset!r}; see `{sys.argv[0]} list`", file=sys.stderr)
+        return 2
+
+    preset = dict(preset)
+    overrides = {
+        "maxCount": args.max_count, "repeatCount": args.repeat_count,
+        "speed": args.speed, "interval": args.interval, "customText": args.custom_text,
+        "tempo": args.tempo,
+    }
+    preset.update({k: v for k, v in overrides.items() if v is not None})
+    if args.no_tempo:
+        preset.pop("tempo", None)
+
+    if not args.no_tts:
+        _init_tts()
+
+    out = sys.stdout
+    stop_flag = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda signum, frame: stop_flag.set())
+
+    on_event = run_event_writer(preset, out, flush_each=args.flush == "event",
+                                tts=not args.no_tts, history=args.history,
+                                patient=args.patient)
+    try:
+        on_event({"event": "start", "elapsed": 0.0, "progress": 0, "say": None,
+                  "preset": preset})
+        done = run_session(preset, stop_flag, on_event)
+        out.flush()
+        if done:
+            flush_speech()
+    except BrokenPipeError:
+        # The consumer went away (e.g. `| head`): stop like SIGTERM, and point
+        # stdout at the null device so the flush at exit does not fail again
+        stop_flag.set()
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return EXIT_STOPPED
+    return EXIT_COMPLETE if done else EXIT_STOPPED
+
+def run_event_writer(preset, out, flush_each=True, tts=True, history=None, patient=""):
+    """The `run` event handler: one JSON line per event, plus speech and history."""
+    speak_now = say_later if preset.get("tempo") else say
+
+    def on_event(ev):
+        out.write(json.dumps(ev, ensure_ascii=False) + "\n")
+        if flush_each:
+            out.flush()
+        if ev["say"] is not None and tts:
+            speak_now(ev["say"])
+        if ev["event"] in ("complete", "stop") and history:
+            log_session(preset, ev, patient, history)
+    return on_event
+
+def tempo_arg(raw):
+    try:
+        return parse_tempo(raw)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def _burn(stop_event):
+    while not stop_event.is_set():
+        sum(range(1000))
+
+def percentile(sorted_values, q):
+    """The q-th percentile (nearest rank) of an ascending list."""
+    return sorted_values[max(0, -(-len(sorted_values) * q // 100) - 1)]
+
+def check_tempo_command(args):
+    """`check-tempo`: run a fast tempo schedule under load and check its jitter."""
+    import multiprocessing
+
+    preset = {"maxCount": args.reps, "repeatCount": args.sets, "interval": 0,
+              "customText": "Set", "tempo": args.tempo}
+    schedule = compile_schedule(preset)
+    # Skip the announcement lead-in; only the phase boundaries matter here
+    offset = schedule[1]["at"]
+    schedule = [dict(ev, at=ev["at"] - offset) for ev in schedule[1:]]
+
+    busy = threading.Event()
+    loads = [threading.Thread(target=_burn, args=(busy,), daemon=True)
+             for _ in range(args.load_threads)]
+    mp_busy = multiprocessing.Event()
+    loads += [multiprocessing.Process(target=_burn, args=(mp_busy,), daemon=True)
+              for _ in range(args.load_processes)]
+    for load in loads:
+        load.start()
+
+    # Events go through the real `run` handler, written to the null device
+    lateness = []
+    try:
+        with open(os.devnull, "w") as out:
+            run_schedule(schedule, threading.Event(),
+                         run_event_writer(preset, out, tts=False), lateness)
+    finally:
+        busy.set()
+        mp_busy.set()
+        for load in loads:
+            load.join()
+
+    ms = sorted(x * 1000 for x in lateness)
+    p99 = percentile(ms, 99)
+    worst = max(ms)
+    # A rep's count event shares its deadline with the first phase
+    rate = len(args.tempo) / sum(p["seconds"] for p in args.tempo)
+    print(f"{len(ms)} events, {rate:.0f} phase boundaries per second during reps, "
+          f"load: {args.load_threads} busy thread(s), {args.load_processes} busy process(es)")
+    print(f"lateness  mean {sum(ms) / len(ms):.3f} ms   p99 {p99:.3f} ms   max {worst:.3f} ms   "
+          f"(limits: p99 {args.p99_limit_ms:g} ms, max {args.limit_ms:g} ms)")
+    if p99 >= args.p99_limit_ms or worst >= args.limit_ms:
+        print("FAIL")
+        return 1
+    print("OK")
+    return 0
+
+def list_command(args):
+    """`list`: print the presets as JSON lines."""
+    for i, p in enumerate(load_presets(), 1):
+        print(json.dumps({"index": i, **p}, ensure_ascii=False))
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Voice counter. Without a command, opens the interactive menu.")
+    sub = parser.add_subparsers(dest="command")
+
+    sub.add_parser("list", help="print presets as JSON lines")
+
+    run = sub.add_parser(
+        "run", help="count one preset non-interactively, streaming JSON-lines events",
+        description="Count one preset with no screen control. One JSON object per "
+                    f"line is written to stdout for the start, each announcement, count, "
+                    f"rest second and the final complete/stop. Exit code is "
+                    f"{EXIT_COMPLETE} when completed, {EXIT_STOPPED} when stopped "
+                    f"(SIGINT/SIGTERM).")
+    run.add_argument("preset", help="preset number (1-based) or label")
+    run.add_argument("--max-count",    type=bounded_int(1, 9999), help="reps per set")
+    run.add_argument("--repeat-count", type=bounded_int(1, 100),  help="number of sets")
+    run.add_argument("--speed",        type=bounded_int(1, 10),   help="counting speed (1-10)")
+    run.add_argument("--interval",     type=bounded_int(0, 600),  help="rest between sets (seconds)")
+    run.add_argument("--custom-text",  help="set label, e.g. Set or Round")
+    run.add_argument("--tempo", type=tempo_arg, metavar="SPEC",
+                     help="per-rep phases as name:seconds[:cue],..., e.g. down:3:Down,hold:1,up:1:Up")
+    run.add_argument("--no-tempo", action="store_true",
+                     help="ignore the preset's tempo and count by speed")
+    run.add_argument("--no-tts", action="store_true",
+                     help="timing only: do not initialise or use text-to-speech")
+    run.add_argument("--flush", choices=("event", "end"), default="event",
+                     help="flush stdout after every event (default) or only at the end")
+    run.add_argument("--patient", default="", help="patient id recorded in the session history")
+    run.add_argument("--history", default=SESSIONS_FILE, metavar="CSV",
+                     help=f"session history file (default: {SESSIONS_FILE})")
+    run.add_argument("--no-history", dest="history", action="store_const", const=None,
+                     help="do not record the session")
+
+    check = sub.add_parser(
+        "check-tempo", help="measure tempo phase boundary accuracy under CPU load",
+        description="Run a fast tempo schedule silently while other threads and "
+                    "processes load the CPU, and fail (exit 1) if any phase boundary "
+                    "fires later than the limit.")
+    check.add_argument("--tempo", type=tempo_arg, default=parse_tempo("down:0.05,hold:0.03,up:0.02"),
+                       metavar="SPEC", help="phases per rep (default: down:0.05,hold:0.03,up:0.02, "
+                                            "30 phase boundaries per second)")
+    check.add_argument("--reps", type=bounded_int(1, 9999), default=40)
+    check.add_argument("--sets", type=bounded_int(1, 100), default=3)
+    check.add_argument("--load-threads", type=bounded_int(0, 64), default=1,
+                       help="busy Python threads competing for the GIL (default: 1)")
+    check.add_argument("--load-processes", type=bounded_int(0, 64), default=os.cpu_count() or 1,
+                       help="busy processes competing for the CPU (default: one per core)")
+    check.add_argument("--p99-limit-ms", type=float, default=10.0,
+                       help="99th percentile lateness must stay below this (default: 10)")
+    check.add_argument("--limit-ms", type=float, default=25.0,
+                       help="no boundary may be this late; a ceiling for scheduler noise "
+                            "(default: 25)")
+    return parser
 
 # ── Settings Menu ─────────────────────────────────────────────────────────────
 def settings_menu(presets):
@@ -248,9 +602,10 @@ def settings_menu(presets):
         clear()
         print_header("Settings — Edit Presets")
         for i, p in enumerate(presets, 1):
+            pace = f"tempo={format_tempo(p['tempo'])}" if p.get("tempo") else f"speed={p['speed']}"
             print(f"  {BOLD}{i}.{RESET} {p['icon']} {p['label']:<16} "
                   f"{DIM}{p['maxCount']} reps x {p['repeatCount']} sets  "
-                  f"speed={p['speed']}  rest={p['interval']}s{RESET}")
+                  f"{pace}  rest={p['interval']}s{RESET}")
         print(f"\n  {BOLD}0.{RESET} Back\n")
 
         choice = input(f"  Select preset to edit (1-{len(presets)}): ").strip()
@@ -277,17 +632,30 @@ def edit_preset(presets, idx):
     speed      = input_int("Speed (1-10)    ", p['speed'],       1, 10)
     interval   = input_int("Rest (seconds)  ", p['interval'],    0, 600)
     ctext      = input(f"  Set label     [{p['customText']}]: ").strip() or p['customText']
+    tempo      = input_tempo(p.get("tempo"))
 
     presets[idx].update({
         "label": label, "maxCount": max_count, "repeatCount": repeat_cnt,
         "speed": speed, "interval": interval, "customText": ctext,
     })
+    if tempo:
+        presets[idx]["tempo"] = tempo
+    else:
+        presets[idx].pop("tempo", None)
     save_presets(presets)
     print(f"\n  {GREEN}Saved!{RESET}")
     time.sleep(1)
 
 # ── Main Menu ─────────────────────────────────────────────────────────────────
 def main():
+    args = build_parser().parse_args()
+    if args.command == "run":
+        sys.exit(run_command(args))
+    if args.command == "list":
+        sys.exit(list_command(args))
+    if args.command == "check-tempo":
+        sys.exit(check_tempo_command(args))
+
     _init_tts()
     presets = load_presets()
 